@@ -29,8 +29,16 @@ class DatabaseConnectionComponents(BaseModel):
 class DatabaseConfig(BaseModel):
     connection_pool_size: int = 10
     connection_timeout_seconds: int = 30
+    connection_idle_timeout_seconds: int = 300  # Pooled connections idle longer than this are reopened
     command_timeout_seconds: int = 60
     max_command_timeout_seconds: int = 300
+    cursor_arraysize: int = 1000  # Rows requested per fetchmany() call
+    plan_cache_size: int = 1024  # Execution plans kept in memory (0 disables the cache)
+    # Cached execution plans expire after this. The server is read-only and never sees DDL,
+    # so the TTL alone bounds staleness after external index/statistics changes; a minute
+    # still covers the explain -> cost check -> review calls an agent makes for one query.
+    plan_cache_ttl_seconds: int = 60
+    schema_cache_ttl_seconds: int = 30  # Cached schema summaries expire after this (0 disables)
     app_name: str = "MCP-SQLServer"
     
     # Map of EnvName -> Connection Components
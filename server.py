@@ -1,6 +1,7 @@
 """
 Production-Ready SQL Server MCP
 """
+import asyncio
 import sys
 from typing import Dict, Any, Optional
 
@@ -33,8 +34,11 @@ schema_service = SchemaService()
 analyzer = SqlAnalyzer()
 review_service = ReviewService(sql_analyzer=analyzer, execution_service=execution_service)
 
+# Tools that talk to SQL Server are async and hand the blocking pyodbc work to a
+# worker thread, so concurrent tool calls don't queue behind each other on the event loop.
+
 @mcp.tool()
-def review_sql_script(script: str, env: Optional[str] = None) -> Dict[str, Any]:
+async def review_sql_script(script: str, env: Optional[str] = None) -> Dict[str, Any]:
     """
     Perform a comprehensive, production-safe review of an SQL script.
     
@@ -44,10 +48,10 @@ def review_sql_script(script: str, env: Optional[str] = None) -> Dict[str, Any]:
     - Best practice violations
     - Schema validation
     """
-    return review_service.review(script, env=env)
+    return await asyncio.to_thread(review_service.review, script, env=env)
 
 @mcp.tool()
-def query_readonly(query: str, env: Optional[str] = None, database: Optional[str] = None, page_size: Optional[int] = None, page: Optional[int] = None) -> Dict[str, Any]:
+async def query_readonly(query: str, env: Optional[str] = None, database: Optional[str] = None, page_size: Optional[int] = None, page: Optional[int] = None, result_format: str = "rows") -> Dict[str, Any]:
     """
     Exectute a READ-ONLY SQL query (SELECT only).
     
@@ -62,29 +66,34 @@ def query_readonly(query: str, env: Optional[str] = None, database: Optional[str
         database: Optional database name override.
         page_size: Optional rows per page (max 1000). If provided, page must also be provided. If omitted, returns all rows up to max_rows limit.
         page: Optional page number (1-based). If provided, page_size must also be provided. If omitted, returns all rows up to max_rows limit.
+        result_format: "rows" (default, list of objects), "columnar" (column names once plus a list of value arrays; smaller for wide/long results) or "column_major" (column names plus one value array per column).
     """
-    return execution_service.execute_readonly(query, env, database, page_size=page_size, page=page)
+    return await asyncio.to_thread(
+        execution_service.execute_readonly,
+        query, env, database, page_size=page_size, page=page, result_format=result_format
+    )
 
 @mcp.tool()
-def schema_summary(env: Optional[str] = None, search_term: Optional[str] = None) -> Dict[str, Any]:
+async def schema_summary(env: Optional[str] = None, search_term: Optional[str] = None, include_columns: bool = True) -> Dict[str, Any]:
     """
     Get a token-efficient summary of the database schema.
     
     Args:
         env: Optional environment override.
         search_term: Optional filter for table or schema names.
+        include_columns: Set False to list table names only (cheaper; no column lookup).
     
     Returns:
         List of "TABLE schema.name: col1 (type), col2 (type)..."
     """
-    return schema_service.get_summary(env, search_term)
+    return await asyncio.to_thread(schema_service.get_summary, env, search_term, include_columns)
 
 @mcp.tool()
-def explain(query: str, env: Optional[str] = None, database: Optional[str] = None) -> Dict[str, Any]:
+async def explain(query: str, env: Optional[str] = None, database: Optional[str] = None) -> Dict[str, Any]:
     """
     Get the estimated execution plan (XML) for a query without executing it.
     """
-    return execution_service.get_execution_plan(query, env, database)
+    return await asyncio.to_thread(execution_service.get_execution_plan, query, env, database)
 
 @mcp.tool()
 def config_info() -> Dict[str, Any]:
@@ -2,14 +2,17 @@
 Comprehensive Best Practices Rule Engine.
 Implements all programmatically checkable rules from sql_best_practices.md.
 """
+import orjson
 from sqlglot import exp
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 from config.configuration import get_config
 
 class BestPracticesEngine:
     def __init__(self):
         self.config = get_config()
+        # Raw sql_best_practices.json, kept after the first successful read
+        self._docs_cache: Optional[bytes] = None
         
     def check_rules(self, expression: exp.Expression) -> List[str]:
         """
@@ -18,6 +21,10 @@ class BestPracticesEngine:
         """
         violations = []
         
+        # Text-based checks share one upper-cased rendering of the statement
+        # (regenerating SQL from the AST is the costly part, so do it once)
+        sql_text = expression.sql().upper()
+        
         # BEGINNER TIPS (Checkable via AST)
         if self.config.best_practices.enforce_no_select_star:
             violations.extend(self._check_select_star(expression))  # BP001
@@ -30,23 +37,23 @@ class BestPracticesEngine:
         violations.extend(self._check_or_in_where(expression))  # BP005
         violations.extend(self._check_distinct_usage(expression))  # BP006
         violations.extend(self._check_in_vs_exists(expression))  # BP007
-        violations.extend(self._check_cursors(expression))  # BP008
+        violations.extend(self._check_cursors(sql_text))  # BP008
         violations.extend(self._check_scalar_functions_in_select(expression))  # BP009
         violations.extend(self._check_large_in_lists(expression))  # BP010
         violations.extend(self._check_union_usage(expression))  # BP011
         violations.extend(self._check_implicit_conversions(expression))  # BP012
         
         # ADDITIONAL CHECKABLE RULES
-        violations.extend(self._check_set_nocount(expression))  # BP013
-        violations.extend(self._check_set_xact_abort(expression))  # BP014
-        violations.extend(self._check_try_catch(expression))  # BP015
+        violations.extend(self._check_set_nocount(sql_text))  # BP013
+        violations.extend(self._check_set_xact_abort(sql_text))  # BP014
+        violations.extend(self._check_try_catch(sql_text))  # BP015
         violations.extend(self._check_proper_joins(expression))  # BP016
-        violations.extend(self._check_temp_tables_vs_variables(expression))  # BP017
+        violations.extend(self._check_temp_tables_vs_variables(sql_text))  # BP017
         violations.extend(self._check_dynamic_sql(expression))  # BP018
-        violations.extend(self._check_transaction_usage(expression))  # BP019
+        violations.extend(self._check_transaction_usage(sql_text))  # BP019
         violations.extend(self._check_subquery_optimization(expression))  # BP020
         violations.extend(self._check_top_usage(expression))  # BP021
-        violations.extend(self._check_stored_procedure_prefix(expression))  # BP022
+        violations.extend(self._check_stored_procedure_prefix(sql_text))  # BP022
         
         return list(set(violations))  # Deduplicate
     
@@ -116,11 +123,10 @@ class BestPracticesEngine:
                 violations.append("BP007: IN with subquery detected. Consider using EXISTS for better performance.")
         return violations
     
-    def _check_cursors(self, expression: exp.Expression) -> List[str]:
+    def _check_cursors(self, sql_text: str) -> List[str]:
         """Avoid cursors - use set-based operations."""
         violations = []
         # Check for DECLARE CURSOR statements
-        sql_text = expression.sql().upper()
         if "DECLARE" in sql_text and "CURSOR" in sql_text:
             violations.append("BP008: Cursor detected. Cursors process rows one-by-one and are slow. Use set-based operations instead.")
         return violations
@@ -177,28 +183,25 @@ class BestPracticesEngine:
                     violations.append(f"BP012: Potential implicit conversion detected. Ensure data types match to avoid index scan.")
         return violations
     
-    def _check_set_nocount(self, expression: exp.Expression) -> List[str]:
+    def _check_set_nocount(self, sql_text: str) -> List[str]:
         """Check for SET NOCOUNT ON in stored procedures."""
         violations = []
-        sql_text = expression.sql().upper()
         if "CREATE PROCEDURE" in sql_text or "CREATE PROC" in sql_text:
             if "SET NOCOUNT ON" not in sql_text:
                 violations.append("BP013: Stored procedure missing 'SET NOCOUNT ON'. This reduces network traffic.")
         return violations
     
-    def _check_set_xact_abort(self, expression: exp.Expression) -> List[str]:
+    def _check_set_xact_abort(self, sql_text: str) -> List[str]:
         """Check for SET XACT_ABORT ON in transactions."""
         violations = []
-        sql_text = expression.sql().upper()
         if "BEGIN TRAN" in sql_text or "BEGIN TRANSACTION" in sql_text:
             if "SET XACT_ABORT ON" not in sql_text:
                 violations.append("BP014: Transaction missing 'SET XACT_ABORT ON'. This ensures automatic rollback on errors.")
         return violations
     
-    def _check_try_catch(self, expression: exp.Expression) -> List[str]:
+    def _check_try_catch(self, sql_text: str) -> List[str]:
         """Check for TRY...CATCH error handling."""
         violations = []
-        sql_text = expression.sql().upper()
         if ("BEGIN TRAN" in sql_text or "CREATE PROCEDURE" in sql_text):
             if "TRY" not in sql_text or "CATCH" not in sql_text:
                 violations.append("BP015: Consider using TRY...CATCH blocks for error handling in procedures and transactions.")
@@ -214,10 +217,9 @@ class BestPracticesEngine:
                 violations.append(f"BP016: {kind or side} OUTER JOIN detected. Prefer INNER JOIN when possible for better performance.")
         return violations
     
-    def _check_temp_tables_vs_variables(self, expression: exp.Expression) -> List[str]:
+    def _check_temp_tables_vs_variables(self, sql_text: str) -> List[str]:
         """Warn about table variables for large datasets."""
         violations = []
-        sql_text = expression.sql().upper()
         if "DECLARE @" in sql_text and "TABLE" in sql_text:
             violations.append("BP017: Table variable detected. For large datasets, use temp tables (#temp) which support indexing.")
         return violations
@@ -231,10 +233,9 @@ class BestPracticesEngine:
                 violations.append("BP018: Dynamic SQL detected. Ensure inputs are parameterized to prevent SQL injection.")
         return violations
     
-    def _check_transaction_usage(self, expression: exp.Expression) -> List[str]:
+    def _check_transaction_usage(self, sql_text: str) -> List[str]:
         """Check for proper transaction usage."""
         violations = []
-        sql_text = expression.sql().upper()
         if "BEGIN TRAN" in sql_text:
             if "COMMIT" not in sql_text and "ROLLBACK" not in sql_text:
                 violations.append("BP019: Transaction started but no COMMIT or ROLLBACK found. Ensure transactions are properly closed.")
@@ -261,10 +262,9 @@ class BestPracticesEngine:
                     violations.append("BP021: SELECT without TOP/LIMIT. Consider limiting result sets to reduce server load.")
         return violations
     
-    def _check_stored_procedure_prefix(self, expression: exp.Expression) -> List[str]:
+    def _check_stored_procedure_prefix(self, sql_text: str) -> List[str]:
         """Check for proper stored procedure naming (usp_ not sp_)."""
         violations = []
-        sql_text = expression.sql().upper()
         if "CREATE PROCEDURE SP_" in sql_text or "CREATE PROC SP_" in sql_text:
             violations.append("BP022: Stored procedure uses 'sp_' prefix. Use 'usp_' for user-defined procedures ('sp_' is for system procedures).")
         return violations
@@ -273,18 +273,23 @@ class BestPracticesEngine:
         """
         Load and return all DBA best practices from sql_best_practices.json.
         This is for documentation/reference purposes via dedicated API.
+        The file is read from disk once; every call parses the cached bytes into a
+        fresh dict, so a caller modifying its result can't affect later calls.
         """
-        import json
-        
         try:
-            json_path = Path(__file__).parent.parent.parent / "config" / "sql_best_practices.json"
-            if not json_path.exists():
-                return {}
-                
-            with open(json_path, "r") as f:
-                practices_data = json.load(f)
+            if self._docs_cache is None:
+                json_path = Path(__file__).parent.parent.parent / "config" / "sql_best_practices.json"
+                if not json_path.exists():
+                    return {}
+                    
+                with open(json_path, "rb") as f:
+                    raw = f.read()
+                practices_data = orjson.loads(raw)
+                # Only cached once it parses, so a transient read error doesn't stick
+                self._docs_cache = raw
+                return practices_data
                 
-            return practices_data
+            return orjson.loads(self._docs_cache)
                     
         except Exception:
             return {}
@@ -3,8 +3,14 @@ Execution Plan Analyzer for SQL Server.
 Parses execution plan XML to detect performance issues and best practice violations.
 """
 import xml.etree.ElementTree as ET
+from collections import defaultdict
 from typing import List, Dict, Any, Optional
 
+_SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+_RELOP_TAG = _SHOWPLAN_NS + 'RelOp'
+_MISSING_INDEX_GROUP_TAG = _SHOWPLAN_NS + 'MissingIndexGroup'
+_SCALAR_OPERATOR_TAG = _SHOWPLAN_NS + 'ScalarOperator'
+
 class ExecutionPlanAnalyzer:
     """Analyzes SQL Server execution plans for performance issues."""
     
@@ -29,32 +35,45 @@ class ExecutionPlanAnalyzer:
         try:
             root = ET.fromstring(plan_xml)
             
+            # Single walk over the plan; each check then reads only the nodes it needs
+            rel_ops: Dict[str, List[ET.Element]] = defaultdict(list)
+            missing_index_groups: List[ET.Element] = []
+            scalar_operators: List[ET.Element] = []
+            for elem in root.iter():
+                tag = elem.tag
+                if tag == _RELOP_TAG:
+                    rel_ops[elem.get('PhysicalOp', '')].append(elem)
+                elif tag == _MISSING_INDEX_GROUP_TAG:
+                    missing_index_groups.append(elem)
+                elif tag == _SCALAR_OPERATOR_TAG:
+                    scalar_operators.append(elem)
+            
             # BP023: Missing Indexes
-            violations.extend(self._check_missing_indexes(root))
+            violations.extend(self._check_missing_indexes(missing_index_groups))
             
             # BP024: Table Scans
-            violations.extend(self._check_table_scans(root))
+            violations.extend(self._check_table_scans(rel_ops))
             
             # BP025: Index Scans vs Seeks
-            violations.extend(self._check_index_scans(root))
+            violations.extend(self._check_index_scans(rel_ops))
             
             # BP026: Implicit Conversions
-            violations.extend(self._check_implicit_conversions(root))
+            violations.extend(self._check_implicit_conversions(scalar_operators))
             
             # BP027: Parallelism Issues
-            violations.extend(self._check_parallelism(root))
+            violations.extend(self._check_parallelism(rel_ops))
             
             # BP028: Expensive Sort Operations
-            violations.extend(self._check_expensive_sorts(root))
+            violations.extend(self._check_expensive_sorts(rel_ops))
             
             # BP029: Hash Operations
-            violations.extend(self._check_hash_operations(root))
+            violations.extend(self._check_hash_operations(rel_ops))
             
             # BP030: Key Lookups
-            violations.extend(self._check_key_lookups(root))
+            violations.extend(self._check_key_lookups(rel_ops))
             
             # BP031: Cardinality Estimation Issues
-            violations.extend(self._check_cardinality_estimation(root))
+            violations.extend(self._check_cardinality_estimation(rel_ops))
             
         except ET.ParseError:
             # Invalid XML, skip analysis
@@ -65,22 +84,21 @@ class ExecutionPlanAnalyzer:
         
         return list(set(violations))
     
-    def _check_missing_indexes(self, root: ET.Element) -> List[str]:
+    def _check_missing_indexes(self, missing_index_groups: List[ET.Element]) -> List[str]:
         """Check for missing index recommendations in plan."""
         violations = []
-        missing_indexes = root.findall('.//p:MissingIndexes/p:MissingIndexGroup', self.namespace)
         
-        if missing_indexes:
-            for idx_group in missing_indexes:
+        if missing_index_groups:
+            for idx_group in missing_index_groups:
                 impact = idx_group.get('Impact', '0')
                 violations.append(f"BP023: Missing index detected (Impact: {impact}%). Consider creating recommended indexes.")
         
         return violations
     
-    def _check_table_scans(self, root: ET.Element) -> List[str]:
+    def _check_table_scans(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for table scan operations."""
         violations = []
-        table_scans = root.findall('.//p:RelOp[@PhysicalOp="Table Scan"]', self.namespace)
+        table_scans = rel_ops.get("Table Scan", [])
         
         for scan in table_scans:
             table_name = self._get_table_name(scan)
@@ -88,10 +106,10 @@ class ExecutionPlanAnalyzer:
         
         return violations
     
-    def _check_index_scans(self, root: ET.Element) -> List[str]:
+    def _check_index_scans(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for index scan operations (prefer seeks)."""
         violations = []
-        index_scans = root.findall('.//p:RelOp[@PhysicalOp="Index Scan"]', self.namespace)
+        index_scans = rel_ops.get("Index Scan", [])
         
         for scan in index_scans:
             table_name = self._get_table_name(scan)
@@ -99,33 +117,32 @@ class ExecutionPlanAnalyzer:
         
         return violations
     
-    def _check_implicit_conversions(self, root: ET.Element) -> List[str]:
+    def _check_implicit_conversions(self, scalar_operators: List[ET.Element]) -> List[str]:
         """Check for implicit conversion warnings in plan."""
         violations = []
         
         # Look for CONVERT_IMPLICIT in plan
-        converts = root.findall('.//p:ScalarOperator[@ScalarString]', self.namespace)
-        for conv in converts:
+        for conv in scalar_operators:
             scalar_str = conv.get('ScalarString', '')
             if 'CONVERT_IMPLICIT' in scalar_str:
                 violations.append("BP026: Implicit conversion detected in execution plan. This prevents index usage. Ensure data types match.")
         
         return violations
     
-    def _check_parallelism(self, root: ET.Element) -> List[str]:
+    def _check_parallelism(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for parallelism operators."""
         violations = []
-        parallelism_ops = root.findall('.//p:RelOp[@PhysicalOp="Parallelism"]', self.namespace)
+        parallelism_ops = rel_ops.get("Parallelism", [])
         
         if len(parallelism_ops) > 3:
             violations.append(f"BP027: Excessive parallelism detected ({len(parallelism_ops)} operators). May indicate inefficient query or MAXDOP settings.")
         
         return violations
     
-    def _check_expensive_sorts(self, root: ET.Element) -> List[str]:
+    def _check_expensive_sorts(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for expensive sort operations."""
         violations = []
-        sorts = root.findall('.//p:RelOp[@PhysicalOp="Sort"]', self.namespace)
+        sorts = rel_ops.get("Sort", [])
         
         for sort in sorts:
             # Check estimated cost
@@ -135,23 +152,21 @@ class ExecutionPlanAnalyzer:
         
         return violations
     
-    def _check_hash_operations(self, root: ET.Element) -> List[str]:
+    def _check_hash_operations(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for hash match operations (joins, aggregates)."""
         violations = []
-        hash_ops = root.findall('.//p:RelOp[contains(@PhysicalOp, "Hash")]', self.namespace)
         
-        for hash_op in hash_ops:
-            op_type = hash_op.get('PhysicalOp', '')
+        for op_type in rel_ops:
             if 'Hash Match' in op_type:
                 violations.append(f"BP029: Hash match operation detected ({op_type}). Consider adding indexes to enable merge or nested loop joins.")
         
         return violations
     
-    def _check_key_lookups(self, root: ET.Element) -> List[str]:
+    def _check_key_lookups(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for key lookup operations (RID/Key lookups)."""
         violations = []
-        key_lookups = root.findall('.//p:RelOp[@PhysicalOp="Key Lookup"]', self.namespace)
-        rid_lookups = root.findall('.//p:RelOp[@PhysicalOp="RID Lookup"]', self.namespace)
+        key_lookups = rel_ops.get("Key Lookup", [])
+        rid_lookups = rel_ops.get("RID Lookup", [])
         
         total_lookups = len(key_lookups) + len(rid_lookups)
         if total_lookups > 0:
@@ -159,14 +174,14 @@ class ExecutionPlanAnalyzer:
         
         return violations
     
-    def _check_cardinality_estimation(self, root: ET.Element) -> List[str]:
+    def _check_cardinality_estimation(self, rel_ops: Dict[str, List[ET.Element]]) -> List[str]:
         """Check for cardinality estimation issues."""
         violations = []
         
         # Look for large discrepancies between estimated and actual rows
-        rel_ops = root.findall('.//p:RelOp[@EstimateRows][@ActualRows]', self.namespace)
-        
-        for op in rel_ops:
+        for op in (op for ops in rel_ops.values() for op in ops):
+            if op.get('EstimateRows') is None or op.get('ActualRows') is None:
+                continue
             try:
                 estimated = float(op.get('EstimateRows', '0'))
                 actual = float(op.get('ActualRows', '0'))
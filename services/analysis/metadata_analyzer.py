@@ -2,10 +2,189 @@
 Metadata-Based Best Practices Checker.
 Queries SQL Server system views to detect configuration and structural issues.
 """
-from typing import List, Dict, Any
+import contextlib
+from typing import Any, Callable, Dict, List, Tuple
 import pyodbc
 from services.infrastructure.db_connection_service import DbConnectionService
 
+# Findings reported per check. Each query stops after this many rows on the
+# server (worst offenders first where there is a measure to rank by) instead
+# of streaming every matching object in a large catalog.
+_MAX_ROWS_PER_CHECK = 50
+
+# System view queries, one per check. Kept as constant text so SQL Server
+# reuses the cached plan for each on every analysis run; analyze_metadata
+# sends them together as a single batch.
+_BP032_STATISTICS_FRESHNESS_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        OBJECT_SCHEMA_NAME(s.object_id) + '.' + OBJECT_NAME(s.object_id) AS table_name,
+        s.name AS stats_name,
+        DATEDIFF(day, STATS_DATE(s.object_id, s.stats_id), GETDATE()) AS days_old
+    FROM sys.stats s
+    WHERE STATS_DATE(s.object_id, s.stats_id) < DATEADD(day, -7, GETDATE())
+    AND OBJECTPROPERTY(s.object_id, 'IsUserTable') = 1
+    ORDER BY days_old DESC
+"""
+
+_BP033_INDEX_FRAGMENTATION_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        OBJECT_SCHEMA_NAME(ips.object_id) + '.' + OBJECT_NAME(ips.object_id) AS table_name,
+        i.name AS index_name,
+        ips.avg_fragmentation_in_percent
+    FROM sys.dm_db_index_physical_stats(DB_ID(), NULL, NULL, NULL, 'LIMITED') ips
+    JOIN sys.indexes i ON ips.object_id = i.object_id AND ips.index_id = i.index_id
+    WHERE ips.avg_fragmentation_in_percent > 30
+    AND ips.page_count > 1000
+    AND i.name IS NOT NULL
+    ORDER BY ips.avg_fragmentation_in_percent DESC
+"""
+
+_BP034_MISSING_STATISTICS_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name
+    FROM sys.tables t
+    LEFT JOIN sys.stats s ON t.object_id = s.object_id
+    WHERE s.stats_id IS NULL
+    AND t.is_ms_shipped = 0
+"""
+
+# The usage DMV is server-wide; scope it to this database before the join, both so
+# it isn't scanned for every database and so another database's object/index ids
+# can't hide an unused index here
+_BP035_UNUSED_INDEXES_SQL = f"""
+    WITH ius AS (
+        SELECT object_id, index_id
+        FROM sys.dm_db_index_usage_stats
+        WHERE database_id = DB_ID()
+    )
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        OBJECT_SCHEMA_NAME(i.object_id) + '.' + OBJECT_NAME(i.object_id) AS table_name,
+        i.name AS index_name
+    FROM sys.indexes i
+    LEFT JOIN ius 
+        ON i.object_id = ius.object_id AND i.index_id = ius.index_id
+    WHERE i.type > 0
+    AND i.is_primary_key = 0
+    AND i.is_unique_constraint = 0
+    AND ius.index_id IS NULL
+    AND OBJECTPROPERTY(i.object_id, 'IsUserTable') = 1
+"""
+
+# This is complex - simplified check for indexes with same key columns
+_BP036_DUPLICATE_INDEXES_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        OBJECT_SCHEMA_NAME(i1.object_id) + '.' + OBJECT_NAME(i1.object_id) AS table_name,
+        i1.name AS index1,
+        i2.name AS index2
+    FROM sys.indexes i1
+    JOIN sys.indexes i2 ON i1.object_id = i2.object_id 
+        AND i1.index_id < i2.index_id
+    WHERE EXISTS (
+        SELECT ic1.column_id
+        FROM sys.index_columns ic1
+        WHERE ic1.object_id = i1.object_id AND ic1.index_id = i1.index_id
+        INTERSECT
+        SELECT ic2.column_id
+        FROM sys.index_columns ic2
+        WHERE ic2.object_id = i2.object_id AND ic2.index_id = i2.index_id
+    )
+"""
+
+# BP037 (partitioning) and BP038 (columnstore) both look at tables over a row
+# threshold, so they share one aggregation of sys.partitions. Each row carries a
+# flag per check, and each check keeps its own top-N by row count.
+_BP037_BP038_LARGE_TABLES_SQL = f"""
+    WITH large_tables AS (
+        SELECT
+            t.object_id,
+            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
+            SUM(p.rows) AS row_count
+        FROM sys.tables t
+        JOIN sys.partitions p ON t.object_id = p.object_id
+        WHERE p.index_id IN (0,1)
+        AND t.is_ms_shipped = 0
+        GROUP BY t.object_id, t.schema_id, t.name
+        HAVING SUM(p.rows) > 5000000
+    ),
+    flagged AS (
+        SELECT
+            lt.table_name,
+            lt.row_count,
+            CASE WHEN lt.row_count > 10000000 THEN 1 ELSE 0 END AS partition_candidate,
+            -- Heuristic: large tables without columnstore in DW scenarios
+            CASE WHEN NOT EXISTS (
+                SELECT 1 FROM sys.indexes i
+                WHERE i.object_id = lt.object_id AND i.type IN (5,6)
+            ) THEN 1 ELSE 0 END AS columnstore_candidate
+        FROM large_tables lt
+    ),
+    ranked AS (
+        SELECT
+            f.*,
+            ROW_NUMBER() OVER (PARTITION BY f.partition_candidate ORDER BY f.row_count DESC) AS partition_rank,
+            ROW_NUMBER() OVER (PARTITION BY f.columnstore_candidate ORDER BY f.row_count DESC) AS columnstore_rank
+        FROM flagged f
+    )
+    SELECT table_name, row_count, partition_candidate, columnstore_candidate
+    FROM ranked
+    WHERE (partition_candidate = 1 AND partition_rank <= {_MAX_ROWS_PER_CHECK})
+    OR (columnstore_candidate = 1 AND columnstore_rank <= {_MAX_ROWS_PER_CHECK})
+    ORDER BY row_count DESC
+"""
+
+_BP039_DATA_TYPES_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
+        c.name AS column_name,
+        ty.name AS data_type,
+        c.max_length
+    FROM sys.columns c
+    JOIN sys.tables t ON c.object_id = t.object_id
+    JOIN sys.types ty ON c.user_type_id = ty.user_type_id
+    WHERE ty.name IN ('nvarchar', 'varchar', 'nchar', 'char')
+    AND c.max_length = -1
+    AND t.is_ms_shipped = 0
+"""
+
+_BP040_HEAP_TABLES_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name
+    FROM sys.tables t
+    WHERE NOT EXISTS (
+        SELECT 1 FROM sys.indexes i 
+        WHERE i.object_id = t.object_id AND i.type = 1
+    )
+    AND t.is_ms_shipped = 0
+"""
+
+_BP041_WIDE_TABLES_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
+        COUNT(*) AS column_count
+    FROM sys.columns c
+    JOIN sys.tables t ON c.object_id = t.object_id
+    WHERE t.is_ms_shipped = 0
+    GROUP BY t.schema_id, t.name
+    HAVING COUNT(*) > 50
+    ORDER BY column_count DESC
+"""
+
+_BP042_FOREIGN_KEY_INDEXES_SQL = f"""
+    SELECT TOP ({_MAX_ROWS_PER_CHECK})
+        OBJECT_SCHEMA_NAME(fk.parent_object_id) + '.' + OBJECT_NAME(fk.parent_object_id) AS table_name,
+        fk.name AS fk_name,
+        COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS column_name
+    FROM sys.foreign_keys fk
+    JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
+    WHERE NOT EXISTS (
+        SELECT 1 FROM sys.index_columns ic
+        WHERE ic.object_id = fkc.parent_object_id
+        AND ic.column_id = fkc.parent_column_id
+        AND ic.index_column_id = 1
+    )
+"""
+
+
 class MetadataAnalyzer:
     """Analyzes database metadata for best practice violations."""
     
@@ -26,321 +205,109 @@ class MetadataAnalyzer:
         violations = []
         
         try:
-            with self.db_service.get_connection(env=env, database=database) as conn:
-                cursor = conn.cursor()
-                
-                # BP032: Statistics Freshness
-                violations.extend(self._check_statistics_freshness(cursor))
-                
-                # BP033: Index Fragmentation
-                violations.extend(self._check_index_fragmentation(cursor))
-                
-                # BP034: Missing Statistics
-                violations.extend(self._check_missing_statistics(cursor))
-                
-                # BP035: Unused Indexes
-                violations.extend(self._check_unused_indexes(cursor))
-                
-                # BP036: Duplicate Indexes
-                violations.extend(self._check_duplicate_indexes(cursor))
-                
-                # BP037: Table Partitioning
-                violations.extend(self._check_table_partitioning(cursor))
-                
-                # BP038: Columnstore Indexes
-                violations.extend(self._check_columnstore_indexes(cursor))
+            with self.db_service.acquire(env=env, db=database) as conn, \
+                 contextlib.closing(conn.cursor()) as cursor:
                 
-                # BP039: Data Type Appropriateness
-                violations.extend(self._check_data_types(cursor))
+                try:
+                    # BP032-BP042 in one round-trip
+                    violations = self._run_batched(cursor)
+                except Exception:
+                    # A failing statement aborts the batch (e.g. no VIEW SERVER STATE
+                    # for the DMVs); rerun each check on its own so the rest still report
+                    violations = [v for sql, formatter in self._checks()
+                                  for v in self._run_check(cursor, sql, formatter)]
                 
-                # BP040: Heap Tables
-                violations.extend(self._check_heap_tables(cursor))
-                
-                # BP041: Wide Tables
-                violations.extend(self._check_wide_tables(cursor))
-                
-                # BP042: Foreign Key Indexes
-                violations.extend(self._check_foreign_key_indexes(cursor))
-                
-        except Exception as e:
+        except Exception:
             # If metadata analysis fails, return empty (don't block main analysis)
             pass
         
         return list(set(violations))
-    
-    def _check_statistics_freshness(self, cursor: pyodbc.Cursor) -> List[str]:
-        """Check for outdated statistics (BP032)."""
-        violations = []
-        query = """
-        SELECT 
-            OBJECT_SCHEMA_NAME(s.object_id) + '.' + OBJECT_NAME(s.object_id) AS table_name,
-            s.name AS stats_name,
-            DATEDIFF(day, STATS_DATE(s.object_id, s.stats_id), GETDATE()) AS days_old
-        FROM sys.stats s
-        WHERE STATS_DATE(s.object_id, s.stats_id) < DATEADD(day, -7, GETDATE())
-        AND OBJECTPROPERTY(s.object_id, 'IsUserTable') = 1
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP032: Statistics on '{row.table_name}' are {row.days_old} days old. Update statistics for better query plans.")
-        except:
-            pass
+
+    def _checks(self) -> List[Tuple[str, Callable[[List[Any]], List[str]]]]:
+        """(query, row formatter) for every check, in batch order."""
+        return [
+            (_BP032_STATISTICS_FRESHNESS_SQL, self._format_statistics_freshness),
+            (_BP033_INDEX_FRAGMENTATION_SQL, self._format_index_fragmentation),
+            (_BP034_MISSING_STATISTICS_SQL, self._format_missing_statistics),
+            (_BP035_UNUSED_INDEXES_SQL, self._format_unused_indexes),
+            (_BP036_DUPLICATE_INDEXES_SQL, self._format_duplicate_indexes),
+            (_BP037_BP038_LARGE_TABLES_SQL, self._format_large_tables),
+            (_BP039_DATA_TYPES_SQL, self._format_data_types),
+            (_BP040_HEAP_TABLES_SQL, self._format_heap_tables),
+            (_BP041_WIDE_TABLES_SQL, self._format_wide_tables),
+            (_BP042_FOREIGN_KEY_INDEXES_SQL, self._format_foreign_key_indexes),
+        ]
+
+    def _run_batched(self, cursor: pyodbc.Cursor) -> List[str]:
+        """Send every check as one batch and read its result sets with nextset()."""
+        checks = self._checks()
+        cursor.execute(";\n".join(sql for sql, _ in checks))
         
+        violations = []
+        for index, (_, formatter) in enumerate(checks):
+            if index and not cursor.nextset():
+                break
+            violations.extend(formatter(cursor.fetchall()))
         return violations
+
+    @staticmethod
+    def _run_check(cursor: pyodbc.Cursor, sql: str, formatter: Callable[[List[Any]], List[str]]) -> List[str]:
+        """Run a single check; a failing check yields no violations."""
+        try:
+            cursor.execute(sql)
+            return formatter(cursor.fetchall())
+        except Exception:
+            return []
+    
+    @staticmethod
+    def _format_statistics_freshness(rows) -> List[str]:
+        """Check for outdated statistics (BP032)."""
+        return [f"BP032: Statistics on '{row.table_name}' are {row.days_old} days old. Update statistics for better query plans." for row in rows]
     
-    def _check_index_fragmentation(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_index_fragmentation(rows) -> List[str]:
         """Check for fragmented indexes (BP033)."""
-        violations = []
-        query = """
-        SELECT 
-            OBJECT_SCHEMA_NAME(ips.object_id) + '.' + OBJECT_NAME(ips.object_id) AS table_name,
-            i.name AS index_name,
-            ips.avg_fragmentation_in_percent
-        FROM sys.dm_db_index_physical_stats(DB_ID(), NULL, NULL, NULL, 'LIMITED') ips
-        JOIN sys.indexes i ON ips.object_id = i.object_id AND ips.index_id = i.index_id
-        WHERE ips.avg_fragmentation_in_percent > 30
-        AND ips.page_count > 1000
-        AND i.name IS NOT NULL
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP033: Index '{row.index_name}' on '{row.table_name}' is {row.avg_fragmentation_in_percent:.1f}% fragmented. Consider rebuilding.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP033: Index '{row.index_name}' on '{row.table_name}' is {row.avg_fragmentation_in_percent:.1f}% fragmented. Consider rebuilding." for row in rows]
     
-    def _check_missing_statistics(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_missing_statistics(rows) -> List[str]:
         """Check for tables without statistics (BP034)."""
-        violations = []
-        query = """
-        SELECT 
-            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name
-        FROM sys.tables t
-        LEFT JOIN sys.stats s ON t.object_id = s.object_id
-        WHERE s.stats_id IS NULL
-        AND t.is_ms_shipped = 0
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP034: Table '{row.table_name}' has no statistics. Create statistics for better query optimization.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP034: Table '{row.table_name}' has no statistics. Create statistics for better query optimization." for row in rows]
     
-    def _check_unused_indexes(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_unused_indexes(rows) -> List[str]:
         """Check for unused indexes (BP035)."""
-        violations = []
-        query = """
-        SELECT 
-            OBJECT_SCHEMA_NAME(i.object_id) + '.' + OBJECT_NAME(i.object_id) AS table_name,
-            i.name AS index_name
-        FROM sys.indexes i
-        LEFT JOIN sys.dm_db_index_usage_stats ius 
-            ON i.object_id = ius.object_id AND i.index_id = ius.index_id
-        WHERE i.type_desc != 'HEAP'
-        AND i.is_primary_key = 0
-        AND i.is_unique_constraint = 0
-        AND ius.index_id IS NULL
-        AND OBJECTPROPERTY(i.object_id, 'IsUserTable') = 1
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP035: Index '{row.index_name}' on '{row.table_name}' is never used. Consider dropping to reduce write overhead.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP035: Index '{row.index_name}' on '{row.table_name}' is never used. Consider dropping to reduce write overhead." for row in rows]
     
-    def _check_duplicate_indexes(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_duplicate_indexes(rows) -> List[str]:
         """Check for duplicate indexes (BP036)."""
-        violations = []
-        # This is complex - simplified check for indexes with same key columns
-        query = """
-        SELECT 
-            OBJECT_SCHEMA_NAME(i1.object_id) + '.' + OBJECT_NAME(i1.object_id) AS table_name,
-            i1.name AS index1,
-            i2.name AS index2
-        FROM sys.indexes i1
-        JOIN sys.indexes i2 ON i1.object_id = i2.object_id 
-            AND i1.index_id < i2.index_id
-        WHERE EXISTS (
-            SELECT ic1.column_id
-            FROM sys.index_columns ic1
-            WHERE ic1.object_id = i1.object_id AND ic1.index_id = i1.index_id
-            INTERSECT
-            SELECT ic2.column_id
-            FROM sys.index_columns ic2
-            WHERE ic2.object_id = i2.object_id AND ic2.index_id = i2.index_id
-        )
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP036: Potential duplicate indexes '{row.index1}' and '{row.index2}' on '{row.table_name}'. Review and consolidate.")
-        except:
-            pass
-        
-        return violations
-    
-    def _check_table_partitioning(self, cursor: pyodbc.Cursor) -> List[str]:
-        """Check for large tables that should be partitioned (BP037)."""
-        violations = []
-        query = """
-        SELECT 
-            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
-            SUM(p.rows) AS row_count
-        FROM sys.tables t
-        JOIN sys.partitions p ON t.object_id = p.object_id
-        WHERE p.index_id IN (0,1)
-        AND t.is_ms_shipped = 0
-        GROUP BY t.schema_id, t.name
-        HAVING SUM(p.rows) > 10000000
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP037: Table '{row.table_name}' has {row.row_count:,} rows. Consider partitioning for better performance.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP036: Potential duplicate indexes '{row.index1}' and '{row.index2}' on '{row.table_name}'. Review and consolidate." for row in rows]
     
-    def _check_columnstore_indexes(self, cursor: pyodbc.Cursor) -> List[str]:
-        """Check for data warehouse tables without columnstore (BP038)."""
-        violations = []
-        # Heuristic: large tables without columnstore in DW scenarios
-        query = """
-        SELECT 
-            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
-            SUM(p.rows) AS row_count
-        FROM sys.tables t
-        JOIN sys.partitions p ON t.object_id = p.object_id
-        WHERE p.index_id IN (0,1)
-        AND t.is_ms_shipped = 0
-        AND NOT EXISTS (
-            SELECT 1 FROM sys.indexes i 
-            WHERE i.object_id = t.object_id AND i.type IN (5,6)
-        )
-        GROUP BY t.schema_id, t.name
-        HAVING SUM(p.rows) > 5000000
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP038: Large table '{row.table_name}' ({row.row_count:,} rows) lacks columnstore index. Consider for analytics workloads.")
-        except:
-            pass
-        
-        return violations
+    @staticmethod
+    def _format_large_tables(rows) -> List[str]:
+        """Check for large tables to partition (BP037) or give a columnstore index (BP038)."""
+        return ([f"BP037: Table '{row.table_name}' has {row.row_count:,} rows. Consider partitioning for better performance."
+                 for row in rows if row.partition_candidate] +
+                [f"BP038: Large table '{row.table_name}' ({row.row_count:,} rows) lacks columnstore index. Consider for analytics workloads."
+                 for row in rows if row.columnstore_candidate])
     
-    def _check_data_types(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_data_types(rows) -> List[str]:
         """Check for oversized data types (BP039)."""
-        violations = []
-        query = """
-        SELECT 
-            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
-            c.name AS column_name,
-            ty.name AS data_type,
-            c.max_length
-        FROM sys.columns c
-        JOIN sys.tables t ON c.object_id = t.object_id
-        JOIN sys.types ty ON c.user_type_id = ty.user_type_id
-        WHERE ty.name IN ('nvarchar', 'varchar', 'nchar', 'char')
-        AND c.max_length = -1
-        AND t.is_ms_shipped = 0
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP039: Column '{row.table_name}.{row.column_name}' uses MAX data type. Specify explicit size when possible.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP039: Column '{row.table_name}.{row.column_name}' uses MAX data type. Specify explicit size when possible." for row in rows]
     
-    def _check_heap_tables(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_heap_tables(rows) -> List[str]:
         """Check for heap tables without clustered index (BP040)."""
-        violations = []
-        query = """
-        SELECT 
-            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name
-        FROM sys.tables t
-        WHERE NOT EXISTS (
-            SELECT 1 FROM sys.indexes i 
-            WHERE i.object_id = t.object_id AND i.type = 1
-        )
-        AND t.is_ms_shipped = 0
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP040: Table '{row.table_name}' is a heap (no clustered index). Add clustered index for better performance.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP040: Table '{row.table_name}' is a heap (no clustered index). Add clustered index for better performance." for row in rows]
     
-    def _check_wide_tables(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_wide_tables(rows) -> List[str]:
         """Check for tables with excessive columns (BP041)."""
-        violations = []
-        query = """
-        SELECT 
-            SCHEMA_NAME(t.schema_id) + '.' + t.name AS table_name,
-            COUNT(*) AS column_count
-        FROM sys.columns c
-        JOIN sys.tables t ON c.object_id = t.object_id
-        WHERE t.is_ms_shipped = 0
-        GROUP BY t.schema_id, t.name
-        HAVING COUNT(*) > 50
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP041: Table '{row.table_name}' has {row.column_count} columns. Consider normalizing or vertical partitioning.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP041: Table '{row.table_name}' has {row.column_count} columns. Consider normalizing or vertical partitioning." for row in rows]
     
-    def _check_foreign_key_indexes(self, cursor: pyodbc.Cursor) -> List[str]:
+    @staticmethod
+    def _format_foreign_key_indexes(rows) -> List[str]:
         """Check for foreign keys without supporting indexes (BP042)."""
-        violations = []
-        query = """
-        SELECT 
-            OBJECT_SCHEMA_NAME(fk.parent_object_id) + '.' + OBJECT_NAME(fk.parent_object_id) AS table_name,
-            fk.name AS fk_name,
-            COL_NAME(fkc.parent_object_id, fkc.parent_column_id) AS column_name
-        FROM sys.foreign_keys fk
-        JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-        WHERE NOT EXISTS (
-            SELECT 1 FROM sys.index_columns ic
-            WHERE ic.object_id = fkc.parent_object_id
-            AND ic.column_id = fkc.parent_column_id
-            AND ic.index_column_id = 1
-        )
-        """
-        
-        try:
-            cursor.execute(query)
-            for row in cursor.fetchall():
-                violations.append(f"BP042: Foreign key '{row.fk_name}' on '{row.table_name}.{row.column_name}' lacks supporting index. Add index for better join performance.")
-        except:
-            pass
-        
-        return violations
+        return [f"BP042: Foreign key '{row.fk_name}' on '{row.table_name}.{row.column_name}' lacks supporting index. Add index for better join performance." for row in rows]
@@ -1,7 +1,10 @@
 from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class Finding(BaseModel):
+    # Immutable once built, so findings are hashable and safe to share
+    model_config = ConfigDict(frozen=True)
+
     code: str
     severity: Literal["CRITICAL", "HIGH", "MEDIUM", "LOW"]
     category: Literal["SECURITY", "PERFORMANCE", "RELIABILITY", "MAINTAINABILITY", "BEST_PRACTICE"]
@@ -3,7 +3,9 @@ Centralized SQL Review Service.
 Orchestrates all analyzers to provide comprehensive SQL script review.
 This service is used by both review_sql_script and execute_readonly to ensure consistency.
 """
-from typing import Dict, Any, Optional, TYPE_CHECKING
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, TYPE_CHECKING
 import structlog
 from services.analysis.sql_analyzer import SqlAnalyzer
 from services.analysis.models import ReviewResult, Finding
@@ -13,6 +15,9 @@ if TYPE_CHECKING:
 
 logger = structlog.get_logger()
 
+# Shared worker pool for metadata analysis, which runs alongside plan retrieval
+_METADATA_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="review-metadata")
+
 
 class ReviewService:
     """
@@ -57,11 +62,18 @@ class ReviewService:
         if result.summary.status == "REJECTED" and result.summary.top_severity == "CRITICAL":
             return result.model_dump()
         
+        # 2 + 3. Execution plan and metadata analysis are independent database
+        # round-trips, so metadata runs on a worker while the plan is fetched here.
+        # Findings are merged in a fixed order (plan, then metadata).
+        metadata_future = _METADATA_EXECUTOR.submit(
+            contextvars.copy_context().run, self._collect_metadata_findings, env, database
+        )
+        
         # 2. Execution Plan Analysis
         self._add_execution_plan_findings(result, sql, env, database)
         
         # 3. Metadata Analysis
-        self._add_metadata_findings(result, env, database)
+        result.issues.extend(metadata_future.result())
         
         # 4. Recalculate Risk Score and Update Status
         self._finalize_review(result)
@@ -116,17 +128,19 @@ class ReviewService:
             logger.warning("execution_plan_analysis_failed", 
                          error=str(e), env=env)
     
-    def _add_metadata_findings(self, result: ReviewResult, 
-                              env: Optional[str] = None, 
-                              database: Optional[str] = None) -> None:
+    def _collect_metadata_findings(self, env: Optional[str] = None, 
+                                   database: Optional[str] = None) -> List[Finding]:
         """
-        Add metadata analysis findings to the review result.
+        Run metadata analysis and return its findings.
         
         Args:
-            result: ReviewResult to update
             env: Target environment
             database: Target database
+            
+        Returns:
+            List of META findings (empty if analysis fails)
         """
+        findings: List[Finding] = []
         try:
             from services.analysis.metadata_analyzer import MetadataAnalyzer
             
@@ -134,7 +148,7 @@ class ReviewService:
             meta_findings_strs = metadata_analyzer.analyze_metadata(env=env, database=database)
             
             for f_str in meta_findings_strs:
-                result.issues.append(Finding(
+                findings.append(Finding(
                     code="META001",
                     severity="MEDIUM",
                     category="RELIABILITY",
@@ -147,6 +161,8 @@ class ReviewService:
             # Metadata analysis failed, log but don't fail the review
             logger.warning("metadata_analysis_failed", 
                          error=str(e), env=env)
+        
+        return findings
     
     def _finalize_review(self, result: ReviewResult) -> None:
         """
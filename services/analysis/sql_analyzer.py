@@ -2,11 +2,14 @@
 Safe SQL Analysis Service using sqlglot.
 Performs static analysis, validation, and risk scoring.
 """
+import hashlib
+import re
 import sqlglot
 from sqlglot import exp
 from typing import List, Dict, Any, Tuple, Set, Optional
 import structlog
 from config.configuration import get_config
+from services.common.ttl_cache import TTLCache
 from services.analysis.best_practices import BestPracticesEngine
 from services.analysis.models import (
     ReviewResult, ReviewSummary, SafetyChecks, Finding, 
@@ -15,6 +18,86 @@ from services.analysis.models import (
 
 logger = structlog.get_logger()
 
+_WORD_RE = re.compile(r'[A-Za-z_]+')
+
+# Statements that can never be read-only; rejected without a full parse
+_NON_SELECT_KEYWORDS = frozenset({
+    "UPDATE", "INSERT", "DELETE", "MERGE", "DROP", "CREATE", "ALTER", "TRUNCATE",
+    "EXEC", "EXECUTE", "GRANT", "REVOKE", "DENY",
+})
+
+
+def _leading_keyword(sql: str) -> Optional[str]:
+    """
+    First word of a script, skipping leading whitespace and -- / /* */ comments.
+    A plain left-to-right scan: linear in the input, with no regex backtracking.
+    """
+    i, n = 0, len(sql)
+    while i < n:
+        if sql[i].isspace():
+            i += 1
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end < 0 else end + 1
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            if end < 0:
+                return None
+            i = end + 2
+        else:
+            break
+    match = _WORD_RE.match(sql, i)
+    return match.group(0) if match else None
+
+
+# Read-only verdicts keyed on (blake2b digest of the SQL, dialect), so each entry
+# is a fixed size however long the query. Verdicts never go stale; the TTL only
+# stops rarely repeated queries from lingering.
+_READONLY_CACHE = TTLCache(maxsize=4096, ttl=3600)
+
+
+def _validate_readonly_cached(sql: str, dialect: str) -> Tuple[bool, str]:
+    """
+    Memoized _check_readonly. Module level so the server's analyzer and the one
+    owned by ExecutionService share a single cache.
+    """
+    key = (hashlib.blake2b(sql.encode("utf-8", "surrogatepass"), digest_size=16).digest(), dialect)
+    verdict = _READONLY_CACHE.get(key)
+    if verdict is None:
+        verdict = _check_readonly(sql, dialect)
+        _READONLY_CACHE.set(key, verdict)
+    return verdict
+
+
+def _check_readonly(sql: str, dialect: str) -> Tuple[bool, str]:
+    """Parse-and-check behind SqlAnalyzer.validate_readonly."""
+    try:
+        parsed = sqlglot.parse(sql, read=dialect)
+        # Filter out None (comments/empty)
+        parsed = [p for p in parsed if p]
+        
+        if not parsed:
+            return False, "Empty query."
+            
+        if len(parsed) > 1:
+            return False, "Multi-statement batches are not allowed in read-only mode."
+            
+        stmt = parsed[0]
+        
+        # Must be SELECT
+        if not isinstance(stmt, exp.Select):
+            return False, f"Only SELECT statements are allowed. Found: {stmt.key}"
+            
+        # Check for allowed constructs
+        if stmt.find(exp.Into):
+            return False, "SELECT INTO is not allowed (write operation)."
+            
+        return True, ""
+        
+    except Exception as e:  # pragma: no cover
+        return False, f"Parsing error: {e}"
+
+
 class SqlAnalyzer:
     def __init__(self):
         self.config = get_config()
@@ -276,29 +359,13 @@ class SqlAnalyzer:
         """
         Strict validation for query_readonly tool.
         Must be a single SELECT statement. No batches.
+        Results are memoized per (SQL digest, dialect); repeated queries skip the parse.
+        Scripts that open with a write/DDL keyword are rejected before parsing.
         """
-        try:
-            parsed = sqlglot.parse(sql, read=self.dialect)
-            # Filter out None (comments/empty)
-            parsed = [p for p in parsed if p]
-            
-            if not parsed:
-                return False, "Empty query."
-                
-            if len(parsed) > 1:
-                return False, "Multi-statement batches are not allowed in read-only mode."
-                
-            stmt = parsed[0]
-            
-            # Must be SELECT
-            if not isinstance(stmt, exp.Select):
-                return False, f"Only SELECT statements are allowed. Found: {stmt.key}"
-                
-            # Check for allowed constructs
-            if stmt.find(exp.Into):
-                return False, "SELECT INTO is not allowed (write operation)."
-                
-            return True, ""
-            
-        except Exception as e:  # pragma: no cover
-            return False, f"Parsing error: {e}"
+        keyword = _leading_keyword(sql)
+        if keyword:
+            keyword = keyword.upper()
+            if keyword in _NON_SELECT_KEYWORDS:
+                return False, f"Only SELECT statements are allowed. Found: {keyword.lower()}"
+        
+        return _validate_readonly_cached(sql, self.dialect)
@@ -1,23 +1,63 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import orjson
 import structlog
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
+# Background writer for log output (see configure_logging)
+_LISTENER: Optional[QueueListener] = None
+
+def _stop_listener():
+    """Flush queued records and stop the background writer, if running."""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
+atexit.register(_stop_listener)
+
+def _orjson_dumps(obj, **kwargs) -> str:
+    """structlog JSON serializer backed by orjson (returns str for stdlib handlers)."""
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, **kwargs).decode()
+    except TypeError:
+        # orjson rejects integers wider than 64 bits; the stdlib encoder doesn't
+        return json.dumps(obj, default=repr)
+
 def configure_logging(log_level: str = "INFO", json_format: bool = True):
     """
     Configure global logging for the application.
-    
+
+    Log records are rendered in the calling thread but written to stdout by a
+    background QueueListener, so request threads never block on stream I/O.
+
     Args:
         log_level: "DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"
         json_format: If True, outputs JSON (best for Prod/K8s). If False, outputs pretty text (Local).
     """
-    
+    global _LISTENER
+
     # 1. Standard Lib Configuration
-    # We want standard logging (e.g. from libraries) to go through our handler
+    # We want standard logging (e.g. from libraries) to go through our handler.
+    # The root logger only enqueues; the listener thread owns the stdout handler.
+    _stop_listener()
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    # QueueHandler formats before enqueueing, so the listener's stream handler
+    # receives the final "%(message)s" text
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    _LISTENER = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    _LISTENER.start()
+
     logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
+        handlers=[queue_handler],
         level=getattr(logging, log_level.upper(), logging.INFO),
+        force=True,
     )
 
     # 2. Processor Chain
@@ -31,7 +71,7 @@ def configure_logging(log_level: str = "INFO", json_format: bool = True):
 
     # 3. Formatter Selection
     if json_format:
-        processors.append(structlog.processors.JSONRenderer())
+        processors.append(structlog.processors.JSONRenderer(serializer=_orjson_dumps))
     else:
         processors.append(structlog.dev.ConsoleRenderer())
 
@@ -40,6 +80,6 @@ def configure_logging(log_level: str = "INFO", json_format: bool = True):
         processors=processors,
         wrapper_class=structlog.make_filtering_bound_logger(getattr(logging, log_level.upper())),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(),
+        logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
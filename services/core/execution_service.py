@@ -3,7 +3,7 @@ Core Execution Service with Comprehensive Security Enforcement.
 Handles 'query_readonly' and 'explain' with multi-layer protection.
 """
 import structlog
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 from services.infrastructure.db_connection_service import DbConnectionService
 from services.analysis.sql_analyzer import SqlAnalyzer
 from services.analysis.review_service import ReviewService
@@ -12,13 +12,32 @@ from services.security.concurrency_throttler import ConcurrencyThrottler, TooMan
 from services.security.nolock_injector import NolockInjector, NolockInjectionError
 from services.security.resource_control_injector import ResourceControlInjector
 from services.common.exceptions import DatabaseError
+from services.common.ttl_cache import TTLCache
 from config.configuration import get_config
+import contextlib
+import datetime
+import decimal
+import hashlib
 import time
+import uuid
 import sqlglot
 from sqlglot import exp
+from sqlglot.tokens import TokenType
 
 logger = structlog.get_logger()
 
+# JSON-safe conversions for the non-JSON types pyodbc returns, keyed on exact
+# type so each value costs one dict lookup instead of an isinstance chain.
+_VALUE_SERIALIZERS = {
+    datetime.datetime: datetime.datetime.isoformat,
+    datetime.date: datetime.date.isoformat,
+    datetime.time: datetime.time.isoformat,
+    decimal.Decimal: str,  # str, not float: keeps DECIMAL/MONEY precision
+    uuid.UUID: str,
+    bytes: lambda b: "0x" + b.hex().upper(),
+    bytearray: lambda b: "0x" + b.hex().upper(),
+}
+
 class ExecutionService:
     """Handles read-only SQL execution with comprehensive security."""
     
@@ -35,8 +54,18 @@ class ExecutionService:
         self.nolock_injector = NolockInjector()
         self.resource_control_injector = ResourceControlInjector()
         
+        # Allowed databases are fixed for the life of the process; normalize once
+        self._allowed_databases = frozenset(db.casefold() for db in self.config.safety.allowed_databases)
+        
         # Initialize review service (pass self for execution plan access)
         self.review_service = ReviewService(sql_analyzer=self.analyzer, execution_service=self)
+        
+        # Successful plans keyed by (env, database, query digest); review, cost
+        # check and explain on the same text then share one SHOWPLAN round-trip
+        self._plan_cache = TTLCache(
+            maxsize=self.config.database.plan_cache_size,
+            ttl=self.config.database.plan_cache_ttl_seconds
+        )
 
 
     def execute_readonly(
@@ -46,7 +75,8 @@ class ExecutionService:
         database: Optional[str] = None,
         user: str = "anonymous",
         page_size: Optional[int] = None,
-        page: Optional[int] = None
+        page: Optional[int] = None,
+        result_format: str = "rows"
     ) -> Dict[str, Any]:
         """
         Execute a SELECT query with comprehensive security enforcement.
@@ -66,11 +96,14 @@ class ExecutionService:
             user: User identifier for throttling
             page_size: Optional number of rows per page (max 1000). If None, returns all rows up to max_rows.
             page: Optional page number (1-based). Required if page_size is provided.
+            result_format: "rows" (list of column->value dicts), "columnar"
+                ({"columns": [...], "rows": [[...], ...]}, column names sent once) or
+                "column_major" ({"columns": [...], "column_data": [[col values], ...]}).
             
         Returns:
             Dict with success status, data, and metadata
         """
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         target_env = env or self.config.environment
         best_practice_warnings = []  # Initialize to ensure it's always defined
         
@@ -92,6 +125,12 @@ class ExecutionService:
                     "error": f"page must be >= 1, got {page}"
                 }
         
+        if result_format not in ("rows", "columnar", "column_major"):
+            return {
+                "success": False,
+                "error": f"result_format must be 'rows', 'columnar' or 'column_major', got '{result_format}'"
+            }
+        
         try:
             # Layer 1: Concurrency Throttling
             with self.concurrency_throttler.acquire(target_env, user):
@@ -106,13 +145,19 @@ class ExecutionService:
                         "risk_score": 100
                     }
                 
-                # Apply pagination to query if requested
+                # Apply pagination to query if requested. Review and cost checks see the
+                # literal form; execution uses ? markers for OFFSET/FETCH so every page
+                # shares one cached plan.
+                query_params: Optional[List[int]] = None
+                paged_query = None
                 if page_size is not None and page is not None:
+                    paged_query = self._apply_pagination(query, page_size, page, parameterized=True)
+                    if paged_query != query:
+                        query_params = [(page - 1) * page_size, page_size]
                     query = self._apply_pagination(query, page_size, page)
                 
                 # Layer 2.1: Allowed Databases Check
-                allowed_databases = self.config.safety.allowed_databases
-                if allowed_databases:  # Empty list means allow all
+                if self._allowed_databases:  # Empty list means allow all
                     # Determine target database
                     target_database = database
                     
@@ -120,18 +165,14 @@ class ExecutionService:
                     if not target_database and target_env in self.config.database.connection_components:
                         target_database = self.config.database.connection_components[target_env].database
                     
-                    if target_database:
-                        # Normalize for comparison (case-insensitive)
-                        target_db_lower = target_database.lower()
-                        allowed_dbs_lower = [db.lower() for db in allowed_databases]
-                        
-                        if target_db_lower not in allowed_dbs_lower:
-                            logger.warning("database_not_allowed", database=target_database, env=target_env)
-                            return {
-                                "success": False,
-                                "error": f"Database '{target_database}' is not in the allowed list. Allowed databases: {', '.join(allowed_databases)}",
-                                "risk_score": 100
-                            }
+                    # Case-insensitive comparison against the set built at startup
+                    if target_database and target_database.casefold() not in self._allowed_databases:
+                        logger.warning("database_not_allowed", database=target_database, env=target_env)
+                        return {
+                            "success": False,
+                            "error": f"Database '{target_database}' is not in the allowed list. Allowed databases: {', '.join(self.config.safety.allowed_databases)}",
+                            "risk_score": 100
+                        }
                 
                 # Layer 2.5: Full SQL Review (like review_sql_script)
                 # This performs comprehensive analysis including best practices, execution plan, and metadata
@@ -262,11 +303,16 @@ class ExecutionService:
                             }
                 
                 # Layer 5: NOLOCK Hint Injection (Production Only)
-                final_query = query
+                final_query = paged_query if query_params else query
                 if self.nolock_injector.should_inject(target_env, enable_nolock):
-                    final_query = self.nolock_injector.inject_nolock_hints(query)
+                    final_query = self.nolock_injector.inject_nolock_hints(final_query)
                     logger.info("nolock_hints_injected", env=target_env)
                 
+                # Layer 5.2: Server-Side Row Limit
+                # Let SQL Server stop producing rows at max_rows instead of
+                # streaming the full result set and discarding the excess here.
+                final_query = self._apply_row_limit(final_query, max_rows)
+                
                 # Layer 5.5: Resource Control Hint Injection (CPU and Memory Limits at SQL Server Level)
                 enable_resource_hints = self.config.safety.get_env_setting(target_env, "enable_resource_hints", self.config.safety.enable_resource_hints)
                 if enable_resource_hints:
@@ -288,8 +334,14 @@ class ExecutionService:
                         )
                 
                 # Layer 6: Execute Query with Monitoring and Payload Size Validation
+                columnar = result_format != "rows"
+                result_columns = []
+                
                 def fetch_strategy(cursor, connection):
-                    columns = [column[0] for column in cursor.description]
+                    # Column names are resolved once; in "rows" format each row is then
+                    # built with dict(zip(...)) so the key/value pairing happens in C.
+                    columns = tuple(column[0] for column in cursor.description)
+                    result_columns.extend(columns)
                     rows = []
                     
                     # Configurable limit for payload size (convert MB to bytes)
@@ -297,28 +349,35 @@ class ExecutionService:
                     max_payload_bytes = max_payload_mb * 1024 * 1024
                     current_payload_size = 0
                     
-                    # Use fetchmany to control memory usage better than fetchall
-                    batch_size = 100
-                    while True:
-                        results = cursor.fetchmany(batch_size)
+                    # Use fetchmany to control memory usage better than fetchall.
+                    # Each batch is sized to the cursor arraysize, but never asks
+                    # for more rows than are still allowed by max_rows.
+                    batch_size = self.config.database.cursor_arraysize
+                    while len(rows) < max_rows:
+                        results = cursor.fetchmany(min(batch_size, max_rows - len(rows)))
                         if not results:
                             break
                             
                         for row in results:
-                            row_dict = {}
+                            values = list(row)
                             row_size_estimate = 0
                             
-                            for i, value in enumerate(row):
-                                col_name = columns[i]
+                            for i, value in enumerate(values):
                                 # Truncate large text
                                 if isinstance(value, str):
                                     row_size_estimate += len(value.encode('utf-8')) # Approximate byte size
                                     if len(value) > 1000:
-                                        value = value[:1000] + "...(truncated)"
+                                        values[i] = value[:1000] + "...(truncated)"
                                 else:
-                                    row_size_estimate += 16 # Rough estimate for other types
-                                    
-                                row_dict[col_name] = value
+                                    serializer = _VALUE_SERIALIZERS.get(type(value))
+                                    if serializer is not None:
+                                        # Serialized values are text too (e.g. hex of a large blob)
+                                        value = values[i] = serializer(value)
+                                        row_size_estimate += len(value)
+                                        if len(value) > 1000:
+                                            values[i] = value[:1000] + "...(truncated)"
+                                    else:
+                                        row_size_estimate += 16 # Rough estimate for other types
                             
                             current_payload_size += row_size_estimate
                             current_payload_size += row_size_estimate
@@ -329,14 +388,11 @@ class ExecutionService:
                                              limit=max_payload_bytes)
                                 raise DatabaseError(f"Query result too large (exceeded {max_payload_bytes/1024/1024:.1f}MB limit). Please refine your filters.")
                                 
-                            rows.append(row_dict)
+                            rows.append(values if columnar else dict(zip(columns, values)))
                             
                             if len(rows) >= max_rows:
                                 break
-                        
-                        if len(rows) >= max_rows:
-                            break
-                    
+
                     return rows
 
                 result = self.db.execute_query(
@@ -344,10 +400,11 @@ class ExecutionService:
                     env=target_env, 
                     db=database, 
                     fetch_method=fetch_strategy,
-                    command_timeout=max_time  # Critical: Enforce query timeout
+                    command_timeout=max_time,  # Critical: Enforce query timeout
+                    params=query_params
                 )
                 
-                execution_time = (time.time() - start_time) * 1000  # ms
+                execution_time = (time.perf_counter_ns() - start_ns) / 1_000_000  # ms (monotonic)
                 
                 # Log metrics
                 logger.info(
@@ -370,7 +427,7 @@ class ExecutionService:
                 # Build response with pagination metadata if applicable
                 response = {
                     "success": True,
-                    "data": result,
+                    "data": self._format_result(result, result_columns, result_format),
                     "row_count": len(result),
                     "execution_time_ms": round(execution_time, 2),
                     "environment": target_env,
@@ -416,7 +473,23 @@ class ExecutionService:
                 "error": f"Execution error: {str(e)}"
             }
 
-    def _apply_pagination(self, query: str, page_size: int, page: int) -> str:
+    @staticmethod
+    def _format_result(rows: list, columns: list, result_format: str) -> Any:
+        """
+        Shape fetched rows for the response.
+        
+        "rows" results are already dicts; "columnar" rows are value lists sent with
+        one column header; "column_major" transposes them into one list per column.
+        """
+        if result_format == "rows":
+            return rows
+        if result_format == "column_major":
+            # zip(*rows) transposes in C; an empty result still yields one list per column
+            column_data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+            return {"columns": columns, "column_data": column_data}
+        return {"columns": columns, "rows": rows}
+
+    def _apply_pagination(self, query: str, page_size: int, page: int, parameterized: bool = False) -> str:
         """
         Apply SQL Server OFFSET/FETCH pagination to a SELECT query.
         
@@ -424,6 +497,8 @@ class ExecutionService:
             query: SQL SELECT query
             page_size: Number of rows per page
             page: Page number (1-based)
+            parameterized: Emit ? markers instead of literals; bind
+                [offset, page_size] when executing
             
         Returns:
             Modified query with OFFSET/FETCH NEXT clauses
@@ -461,15 +536,18 @@ class ExecutionService:
                 logger.info("added_dummy_order_by_for_pagination")
             
             # Add OFFSET using sqlglot's expression builder
-            offset_expr = exp.Offset(expression=exp.Literal.number(offset))
+            offset_value = exp.Placeholder() if parameterized else exp.Literal.number(offset)
+            offset_expr = exp.Offset(expression=offset_value)
             select_stmt.set("offset", offset_expr)
             
             # Add FETCH NEXT using sqlglot's expression builder
+            # (sqlglot keeps FETCH in the "limit" slot of a Select)
+            fetch_value = exp.Placeholder() if parameterized else exp.Literal.number(page_size)
             fetch_expr = exp.Fetch(
-                kind="NEXT",
-                expression=exp.Literal.number(page_size)
+                direction="NEXT",
+                count=fetch_value
             )
-            select_stmt.set("fetch", fetch_expr)
+            select_stmt.set("limit", fetch_expr)
             
             # Convert back to SQL
             return select_stmt.sql(dialect="tsql")
@@ -479,6 +557,46 @@ class ExecutionService:
             # Return original query if pagination fails
             return query
 
+    def _apply_row_limit(self, query: str, max_rows: int) -> str:
+        """
+        Add TOP (max_rows) to a plain SELECT that has no row limit of its own.
+        
+        The clause is spliced into the original text right after SELECT (and
+        DISTINCT/ALL); the query is never regenerated, so what runs is exactly
+        what was validated (sqlglot would otherwise rewrite e.g. ISNULL as COALESCE).
+        
+        Args:
+            query: SQL SELECT query
+            max_rows: Maximum number of rows the caller will fetch
+            
+        Returns:
+            Query with a TOP clause, or the original query if it already limits
+            rows (TOP / OFFSET / FETCH), has a CTE, or is not a single SELECT
+        """
+        try:
+            parsed = [p for p in sqlglot.parse(query, read="tsql") if p]
+            if len(parsed) != 1 or not isinstance(parsed[0], exp.Select):
+                return query
+            
+            select_stmt = parsed[0]
+            if any(select_stmt.args.get(arg) for arg in ("limit", "offset", "fetch", "with")):
+                return query
+            
+            tokens = sqlglot.tokenize(query, read="tsql")
+            if not tokens or tokens[0].token_type != TokenType.SELECT:
+                return query
+            splice_after = tokens[0]
+            if len(tokens) > 1 and tokens[1].token_type in (TokenType.DISTINCT, TokenType.ALL):
+                splice_after = tokens[1]
+            
+            pos = splice_after.end + 1
+            return f"{query[:pos]} TOP ({max_rows}){query[pos:]}"
+            
+        except Exception as e:
+            logger.error("row_limit_application_failed", error=str(e), query=query[:100])
+            # Return original query; fetch_strategy still caps rows client-side
+            return query
+
     def get_execution_plan(self, query: str, env: Optional[str] = None, database: Optional[str] = None) -> Dict[str, Any]:
         """
         Get SQL Server execution plan XML.
@@ -492,26 +610,37 @@ class ExecutionService:
             Dict with success status and plan XML
         """
         target_env = env or self.config.environment
+        cache_key = (target_env, database, hashlib.blake2b(query.encode(), digest_size=16).digest())
+        cached = self._plan_cache.get(cache_key)
+        if cached is not None:
+            # Copy, so callers can't alter the cached entry
+            return dict(cached)
         
         try:
-            # Wrap query to get execution plan
-            plan_query = f"SET SHOWPLAN_XML ON; {query}; SET SHOWPLAN_XML OFF;"
+            # SET SHOWPLAN_XML must be the only statement in its batch, so ON, the
+            # query and OFF are sent as three batches on one checked-out connection.
+            # OFF always runs; if anything here raises, acquire() closes the connection
+            # rather than pooling one that may still be in SHOWPLAN mode.
+            with self.db.acquire(target_env, database) as conn:
+                # Pooled connections keep the last caller's timeout; set our own
+                conn.timeout = self.config.database.command_timeout_seconds
+                with contextlib.closing(conn.cursor()) as cursor:
+                    cursor.execute("SET SHOWPLAN_XML ON")
+                    try:
+                        cursor.execute(query)
+                        # Execution plan is returned as result set; large plans arrive
+                        # split across rows, joined once rather than concatenated per row
+                        plan_xml = "".join(str(row[0]) for row in cursor.fetchall() if row[0])
+                    finally:
+                        cursor.execute("SET SHOWPLAN_XML OFF")
             
-            def fetch_plan(cursor, connection):
-                # Execution plan is returned as result set
-                plan_xml = ""
-                for row in cursor.fetchall():
-                    if row[0]:
-                        plan_xml += str(row[0])
-                return plan_xml
-            
-            plan_xml = self.db.execute_query(plan_query, env=target_env, db=database, fetch_method=fetch_plan)
-            
-            return {
+            result = {
                 "success": True,
                 "plan_xml": plan_xml,
                 "environment": target_env
             }
+            self._plan_cache.set(cache_key, result)
+            return dict(result)
             
         except Exception as e:
             logger.error("execution_plan_error", env=target_env, error=str(e))
@@ -1,77 +1,112 @@
 """
 Token-Optimized Schema Service.
 """
+import structlog
 from typing import Dict, Any, List, Optional
 from services.infrastructure.db_connection_service import DbConnectionService
+from services.common.ttl_cache import TTLCache
 from config.configuration import get_config
 
+logger = structlog.get_logger()
+
+# Tables returned for a search (the whole catalog is returned without one)
+_MAX_SEARCH_TABLES = 51
+_ALL_TABLES = 2147483647
+
+# We query sys tables for speed and detail.
+# Parameters: table cap, then the optional "schema.table" LIKE filter twice (pattern or NULL).
+# Tables are filtered and capped before any join, so columns are only read for tables returned.
+_MATCHED_TABLES_CTE = """
+WITH matched AS (
+    SELECT TOP (?)
+        t.object_id,
+        s.name as schema_name,
+        t.name as table_name
+    FROM sys.tables t
+    JOIN sys.schemas s ON t.schema_id = s.schema_id
+    WHERE t.is_ms_shipped = 0
+    AND (? IS NULL OR s.name + '.' + t.name LIKE ?)
+    ORDER BY s.name, t.name
+)"""
+
+# Columns are aggregated server-side into one "col (type), ..." string per table, so one
+# row per table crosses the wire instead of one per column (STRING_AGG: SQL Server 2017+).
+# The list is cut at 501 characters: enough for get_summary to see it needs truncating.
+_SCHEMA_SUMMARY_SQL = _MATCHED_TABLES_CTE + """
+SELECT 
+    m.schema_name,
+    m.table_name,
+    LEFT(STRING_AGG(CAST(c.name + ' (' + ty.name + ')' AS nvarchar(max)), ', ')
+        WITHIN GROUP (ORDER BY c.column_id), 501) as columns
+FROM matched m
+JOIN sys.columns c ON m.object_id = c.object_id
+JOIN sys.types ty ON c.user_type_id = ty.user_type_id
+GROUP BY m.schema_name, m.table_name
+ORDER BY m.schema_name, m.table_name
+"""
+
+# Table names only: sys.columns and sys.types are never touched
+_TABLE_NAMES_SQL = _MATCHED_TABLES_CTE + """
+SELECT m.schema_name, m.table_name
+FROM matched m
+ORDER BY m.schema_name, m.table_name
+"""
+
+
+def _like_pattern(search_term: str) -> str:
+    """Build a "contains" LIKE pattern, escaping LIKE wildcards in the term."""
+    escaped = search_term.replace("[", "[[]").replace("%", "[%]").replace("_", "[_]")
+    return f"%{escaped}%"
+
+
 class SchemaService:
     def __init__(self):
         self.db = DbConnectionService()
         self.config = get_config()
+        # Processed summaries keyed by (env, search_term); catalog queries are
+        # expensive and the schema rarely changes between successive tool calls
+        self._summary_cache = TTLCache(maxsize=256, ttl=self.config.database.schema_cache_ttl_seconds)
 
-    def get_summary(self, env: Optional[str] = None, search_term: Optional[str] = None) -> Dict[str, Any]:
+    def get_summary(self, env: Optional[str] = None, search_term: Optional[str] = None,
+                    include_columns: bool = True) -> Dict[str, Any]:
         """
         Return a concise schema summary (tables, columns, types) optimized for LLM context.
+        With include_columns=False only "TABLE schema.name" lines are returned.
         """
-        # We query sys tables for speed and detail
-        sql = """
-        SELECT 
-            s.name as schema_name,
-            t.name as table_name,
-            c.name as column_name,
-            ty.name as type_name,
-            c.max_length
-        FROM sys.tables t
-        JOIN sys.schemas s ON t.schema_id = s.schema_id
-        JOIN sys.columns c ON t.object_id = c.object_id
-        JOIN sys.types ty ON c.user_type_id = ty.user_type_id
-        WHERE t.is_ms_shipped = 0
-        ORDER BY s.name, t.name, c.column_id
-        """
-        
-        # If search provided, filter in python or SQL? SQL is better but we built a static query.
-        # Let's filter in python for flexibility or append WHERE if needed.
-        if search_term:
-            # Safe parameterization needed if we inject. 
-            # For simplicity, let's fetch all (metadata is usually small enough < 1MB) 
-            # and filter, unless it's huge.
-            pass
+        cache_key = (env or self.config.environment, search_term, include_columns)
+        cached = self._summary_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "summary": list(cached["summary"])}
+
+        # The search filter is bound as a parameter, so every search shares one
+        # cached plan and only matching tables cross the wire
+        pattern = _like_pattern(search_term) if search_term else None
+        params = [_MAX_SEARCH_TABLES if search_term else _ALL_TABLES, pattern, pattern]
 
         try:
-            results = self.db.execute_query(sql, env=env, fetch_method=lambda c, _: c.fetchall())
+            sql = _SCHEMA_SUMMARY_SQL if include_columns else _TABLE_NAMES_SQL
+            results = self.db.execute_query(sql, env=env, fetch_method=lambda c, _: c.fetchall(),
+                                            params=params)
             
-            schema_map = {}
-            for row in results or []:
-                schema_val, table_val, col_val, type_val, len_val = row
-                
-                full_table = f"{schema_val}.{table_val}"
-                if search_term and search_term.lower() not in full_table.lower():
-                    continue
-
-                if full_table not in schema_map:
-                    schema_map[full_table] = []
-                
-                # Concise format: "col_name (type)"
-                schema_map[full_table].append(f"{col_val} ({type_val})")
-
             # Format as compact string list
-            summary = []
-            for table, cols in schema_map.items():
-                if len(summary) > 50 and search_term: 
-                    # Cap results if searching
-                   break
-                
-                col_str = ", ".join(cols)
-                if len(col_str) > 500:
-                    col_str = col_str[:500] + "..."
-                summary.append(f"TABLE {table}: {col_str}")
+            if include_columns:
+                summary = []
+                for schema_val, table_val, col_str in results or []:
+                    if len(col_str) > 500:
+                        col_str = col_str[:500] + "..."
+                    summary.append(f"TABLE {schema_val}.{table_val}: {col_str}")
+            else:
+                summary = [f"TABLE {schema_val}.{table_val}" for schema_val, table_val in results or []]
 
-            return {
+            result = {
                 "success": True,
                 "summary": summary,
                 "count": len(summary)
             }
+            self._summary_cache.set(cache_key, result)
+            return {**result, "summary": list(summary)}
             
         except Exception as e:
+            # The client only gets the message; the server log keeps env and search context
+            logger.error("schema_summary_error", env=cache_key[0], search_term=search_term, error=str(e))
             return {"success": False, "error": str(e)}
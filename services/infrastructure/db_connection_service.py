@@ -1,11 +1,12 @@
 import contextlib
 import pyodbc
+import re
 import structlog
 import time
 import threading
 from queue import Queue, Empty
-from typing import Dict, Any, Optional, Callable
-from services.common.exceptions import DatabaseError, ConfigurationError
+from typing import Dict, Any, Optional, Callable, Iterator, Sequence
+from services.common.exceptions import DatabaseError, ConfigurationError, ValidationError
 from config.configuration import get_config
 
 logger = structlog.get_logger()
@@ -16,17 +17,24 @@ logger = structlog.get_logger()
 _CONNECTION_POOLS: Dict[str, 'SimpleConnectionPool'] = {}
 _POOL_LOCK = threading.Lock()
 
+# Database names accepted from callers. They are spliced into the ODBC connection
+# string, so ';', '=' and braces (which would add or override keywords) never match.
+_DATABASE_NAME_RE = re.compile(r'[\w$#@.\- ]{1,128}')
+
 class SimpleConnectionPool:
     """
     A simple thread-safe connection pool for pyodbc connections.
     """
-    def __init__(self, key: str, max_size: int = 10, timeout: int = 30):
+    def __init__(self, key: str, max_size: int = 10, timeout: int = 30, idle_timeout: int = 300):
         self.key = key
         self.max_size = max_size
         self.timeout = timeout
+        self.idle_timeout = idle_timeout
         self.pool = Queue(maxsize=max_size)
         self.current_count = 0
         self.lock = threading.Lock()
+        # id(conn) -> monotonic time it was returned to the pool
+        self._idle_since: Dict[int, float] = {}
 
     def get_connection(self, connection_factory: Callable[[], pyodbc.Connection]) -> pyodbc.Connection:
         """Get a connection from the pool or create a new one."""
@@ -34,8 +42,8 @@ class SimpleConnectionPool:
             # Try to get an idle connection immediately
             conn = self.pool.get_nowait()
             
-            # Verify connection is alive
-            if self._validate_connection(conn):
+            # Verify connection is alive (stale connections are dropped without a round-trip)
+            if not self._is_expired(conn) and self._validate_connection(conn):
                 return conn
             else:
                 # Connection dead, discard and decrement count to allow replacement
@@ -62,7 +70,7 @@ class SimpleConnectionPool:
         # Pool exhausted, wait for one
         try:
             conn = self.pool.get(timeout=self.timeout)
-            if self._validate_connection(conn):
+            if not self._is_expired(conn) and self._validate_connection(conn):
                 return conn
             else:
                 # If we got a bad connection from pool, we must eventually create a new one
@@ -85,13 +93,23 @@ class SimpleConnectionPool:
             return
 
         try:
-            # Rollback any uncommitted transaction
-            conn.rollback()
+            # Rollback any uncommitted transaction. Autocommit connections never
+            # hold one open, so the extra round-trip is skipped for them.
+            if not conn.autocommit:
+                conn.rollback()
+            self._idle_since[id(conn)] = time.monotonic()
             self.pool.put_nowait(conn)
         except:
             # Pool full or other error
             self._discard_connection(conn)
 
+    def _is_expired(self, conn: pyodbc.Connection) -> bool:
+        """Check if connection sat idle in the pool longer than idle_timeout."""
+        idle_since = self._idle_since.pop(id(conn), None)
+        if idle_since is None:
+            return False
+        return time.monotonic() - idle_since > self.idle_timeout
+
     def _validate_connection(self, conn: pyodbc.Connection) -> bool:
         """Check if connection is healthy."""
         try:
@@ -103,6 +121,7 @@ class SimpleConnectionPool:
 
     def _discard_connection(self, conn: pyodbc.Connection):
         """Close and discard a connection."""
+        self._idle_since.pop(id(conn), None)
         try:
             conn.close()
         except:
@@ -111,12 +130,17 @@ class SimpleConnectionPool:
             if self.current_count > 0:
                 self.current_count -= 1
 
-def get_pool(key: str, max_size: int, timeout: int) -> SimpleConnectionPool:
+def get_pool(key: str, max_size: int, timeout: int, idle_timeout: int = 300) -> SimpleConnectionPool:
     """Get or create a singleton pool for the given key."""
+    # Pools are never removed, so an existing one can be read without the global lock
+    pool = _CONNECTION_POOLS.get(key)
+    if pool is not None:
+        return pool
     with _POOL_LOCK:
-        if key not in _CONNECTION_POOLS:
-            _CONNECTION_POOLS[key] = SimpleConnectionPool(key, max_size, timeout)
-        return _CONNECTION_POOLS[key]
+        pool = _CONNECTION_POOLS.get(key)
+        if pool is None:
+            pool = _CONNECTION_POOLS[key] = SimpleConnectionPool(key, max_size, timeout, idle_timeout)
+        return pool
 
 # Circuit Breaker State
 _CIRCUIT_STATE = {
@@ -138,7 +162,7 @@ class DbConnectionService:
     def _check_circuit_breaker(self):
         with _CIRCUIT_LOCK:
             if _CIRCUIT_STATE["is_open"]:
-                if time.time() - _CIRCUIT_STATE["last_failure_time"] > RESET_TIMEOUT:
+                if time.monotonic() - _CIRCUIT_STATE["last_failure_time"] > RESET_TIMEOUT:
                     # Half-open: try one request
                     _CIRCUIT_STATE["is_open"] = False
                     _CIRCUIT_STATE["failures"] = 0
@@ -149,7 +173,7 @@ class DbConnectionService:
     def _record_failure(self):
         with _CIRCUIT_LOCK:
             _CIRCUIT_STATE["failures"] += 1
-            _CIRCUIT_STATE["last_failure_time"] = time.time()
+            _CIRCUIT_STATE["last_failure_time"] = time.monotonic()
             if _CIRCUIT_STATE["failures"] >= MAX_FAILURES:
                 _CIRCUIT_STATE["is_open"] = True
                 logger.error("circuit_breaker_opened", failures=_CIRCUIT_STATE["failures"])
@@ -169,6 +193,9 @@ class DbConnectionService:
         if target_env not in self.config.available_environments:
             raise ConfigurationError(f"Environment '{target_env}' is not configured.")
         
+        if db and _DATABASE_NAME_RE.fullmatch(db) is None:
+            raise ValidationError(f"Invalid database name '{db}'.")
+        
         # Priority 1: Use connection components with builder
         if target_env in self.config.database.connection_components:
             from services.infrastructure.connection_string_builder import ConnectionStringBuilder
@@ -199,6 +226,32 @@ class DbConnectionService:
         
         raise ConfigurationError(f"No connection configuration for environment '{target_env}'.")
 
+    def _get_pool(self, conn_str: str) -> SimpleConnectionPool:
+        """Get the shared pool for a connection string."""
+        return get_pool(
+            key=conn_str,
+            max_size=self.config.database.connection_pool_size,
+            timeout=self.config.database.connection_timeout_seconds,
+            idle_timeout=self.config.database.connection_idle_timeout_seconds
+        )
+
+    @contextlib.contextmanager
+    def acquire(self, env: Optional[str] = None, db: Optional[str] = None) -> Iterator[pyodbc.Connection]:
+        """
+        Check out a pooled connection for the duration of a `with` block.
+        On a clean exit the connection goes back to its pool. If the block raised,
+        the connection's session state is unknown (e.g. a SET option left on, a
+        half-read result), so it is closed instead of being reused.
+        """
+        pool = self._get_pool(self._get_connection_string(env, db))
+        conn = self.get_connection(env, db)
+        try:
+            yield conn
+        except BaseException:
+            pool._discard_connection(conn)
+            raise
+        pool.return_connection(conn)
+
     def get_connection(self, env: Optional[str] = None, db: Optional[str] = None) -> pyodbc.Connection:
         """
         Get a connection from the pool (or create new via pool).
@@ -209,27 +262,27 @@ class DbConnectionService:
             conn_str = self._get_connection_string(env, db)
             
             # Get pool for this connection string
-            pool = get_pool(
-                key=conn_str, 
-                max_size=self.config.database.connection_pool_size,
-                timeout=self.config.database.connection_timeout_seconds
-            )
+            pool = self._get_pool(conn_str)
             
             timeout = self.config.database.connection_timeout_seconds
 
             def connection_factory():
                 # Factory to create NEW connection if pool needs one
                 try:
-                    conn = pyodbc.connect(conn_str, timeout=timeout)
+                    # Autocommit: read-only statements never leave an open transaction
+                    # behind, so connections can go back to the pool without a rollback
+                    conn = pyodbc.connect(conn_str, timeout=timeout, autocommit=True)
                     
-                    # Apply Mandatory Safety Settings
+                    # Apply Mandatory Safety Settings (one batch, one round-trip)
                     with contextlib.closing(conn.cursor()) as cursor:
-                        cursor.execute("SET NOCOUNT ON")
-                        cursor.execute("SET XACT_ABORT ON")
-                        cursor.execute(f"SET LOCK_TIMEOUT {timeout * 1000}") 
-                        cursor.execute("SET DEADLOCK_PRIORITY LOW")
-                        cursor.execute("SET TRANSACTION ISOLATION LEVEL READ COMMITTED")
-                        cursor.execute("SET ARITHABORT ON")
+                        cursor.execute(
+                            "SET NOCOUNT ON; "
+                            "SET XACT_ABORT ON; "
+                            f"SET LOCK_TIMEOUT {timeout * 1000}; "
+                            "SET DEADLOCK_PRIORITY LOW; "
+                            "SET TRANSACTION ISOLATION LEVEL READ COMMITTED; "
+                            "SET ARITHABORT ON;"
+                        )
                     return conn
                 except Exception as e:
                     self._record_failure()
@@ -250,9 +303,13 @@ class DbConnectionService:
                       env: Optional[str] = None,
                       db: Optional[str] = None,
                       fetch_method: Optional[Callable] = None,
-                      command_timeout: Optional[int] = None) -> Optional[Any]:
+                      command_timeout: Optional[int] = None,
+                      params: Optional[Sequence[Any]] = None) -> Optional[Any]:
         """
         Execute a SQL Server query with strict safety and timeout controls.
+        
+        When params are given the query is sent with ? markers bound by the driver
+        (sp_prepexec), so SQL Server reuses one cached plan across parameter values.
         """
         # Load config limits
         cmd_timeout = command_timeout or self.config.database.command_timeout_seconds
@@ -262,52 +319,43 @@ class DbConnectionService:
             logger.warning(f"Requested timeout {cmd_timeout}s exceeds max {max_timeout}s. Capping.", query_snippet=query[:50])
             cmd_timeout = max_timeout
             
-        conn = None
-        conn_str = "" # Need key to return to pool
-        pool = None
-        
         try:
-            # We need the connection string/key to identify the pool
-            # get_connection handles finding the pool, but we need to know WHICH pool to return to.
-            # So we re-resolve the string to find the pool instance.
-            conn_str = self._get_connection_string(env, db)
-            pool = get_pool(conn_str, self.config.database.connection_pool_size, self.config.database.connection_timeout_seconds)
-            
-            # Get connection
-            conn = self.get_connection(env, db) # This calls pool.get_connection internally
-            
-            # Set Command Timeout
-            conn.timeout = cmd_timeout
-            
-            with contextlib.closing(conn.cursor()) as cursor:
-                if hasattr(cursor, 'timeout'):
-                    cursor.timeout = cmd_timeout
+            with self.acquire(env, db) as conn:
+                # Set Command Timeout
+                conn.timeout = cmd_timeout
                 
-                # Dynamic LOCK_TIMEOUT for this specific query if needed
-                # cursor.execute(f"SET LOCK_TIMEOUT {cmd_timeout * 1000}")
-                
-                start_time = time.time()
-                cursor.execute(query)
-                
-                if cursor.description:
-                    result = (fetch_method or self._default_fetch)(cursor, conn)
-                else:
-                    conn.commit()
-                    result = None
+                with contextlib.closing(conn.cursor()) as cursor:
+                    if hasattr(cursor, 'timeout'):
+                        cursor.timeout = cmd_timeout
+
+                    # Default batch size for fetchmany() (pyodbc defaults to 1 row)
+                    cursor.arraysize = self.config.database.cursor_arraysize
+                    
+                    # Dynamic LOCK_TIMEOUT for this specific query if needed
+                    # cursor.execute(f"SET LOCK_TIMEOUT {cmd_timeout * 1000}")
                     
-                duration = time.time() - start_time
-                if duration > 1.0:
-                    logger.info("slow_query", duration=duration, query_snippet=query[:100])
+                    start_ns = time.perf_counter_ns()
+                    if params:
+                        cursor.execute(query, *params)
+                    else:
+                        cursor.execute(query)
                     
-                return result
+                    if cursor.description:
+                        result = (fetch_method or self._default_fetch)(cursor, conn)
+                    else:
+                        conn.commit()
+                        result = None
+                        
+                    duration = (time.perf_counter_ns() - start_ns) / 1e9
+                    if duration > 1.0:
+                        logger.info("slow_query", duration=duration, query_snippet=query[:100])
+                        
+                    return result
 
         except pyodbc.Error as e:
             raise DatabaseError(f"Database error: {str(e)}", details={"query": query[:200], "database": db})
         except Exception as e:
             raise DatabaseError(f"Unexpected error: {str(e)}", details={"query": query[:200]})
-        finally:
-            if conn and pool:
-                pool.return_connection(conn)
 
     @staticmethod
     def _default_fetch(cursor, connection):
@@ -53,12 +53,11 @@ class ConcurrencyThrottler:
         acquired = False
         try:
             with self.lock:
-                # Initialize environment tracking
-                if env not in self.active_queries:
-                    self.active_queries[env] = {}
+                # Initialize environment tracking (one lookup, reused below)
+                env_queries = self.active_queries.setdefault(env, {})
                 
                 # Check total concurrent queries for environment
-                total_queries = sum(self.active_queries[env].values())
+                total_queries = sum(env_queries.values())
                 if total_queries >= self.max_concurrent_queries:
                     raise TooManyConcurrentQueriesError(
                         f"Too many concurrent queries on {env} environment "
@@ -66,7 +65,7 @@ class ConcurrencyThrottler:
                     )
                 
                 # Check per-user limit
-                user_queries = self.active_queries[env].get(user, 0)
+                user_queries = env_queries.get(user, 0)
                 if user_queries >= self.max_concurrent_queries_per_user:
                     raise TooManyConcurrentQueriesError(
                         f"Too many concurrent queries for user '{user}' "
@@ -74,7 +73,7 @@ class ConcurrencyThrottler:
                     )
                 
                 # Acquire slot
-                self.active_queries[env][user] = user_queries + 1
+                env_queries[user] = user_queries + 1
                 acquired = True
                 
                 logger.info(
@@ -92,9 +91,11 @@ class ConcurrencyThrottler:
             # Release slot
             if acquired:
                 with self.lock:
-                    self.active_queries[env][user] -= 1
-                    if self.active_queries[env][user] == 0:
-                        del self.active_queries[env][user]
+                    remaining = env_queries[user] - 1
+                    if remaining:
+                        env_queries[user] = remaining
+                    else:
+                        del env_queries[user]
                     
                     logger.info("query_slot_released", env=env, user=user)
     
@@ -7,6 +7,11 @@ import re
 
 logger = structlog.get_logger()
 
+# Trailing OPTION (...) clause; group 1 is the hint list inside it
+_OPTION_CLAUSE_RE = re.compile(r'\bOPTION\s*\(([^)]*)\)\s*;?\s*$', re.IGNORECASE)
+# Separator between hints, consuming the surrounding whitespace in the same pass
+_HINT_SPLIT_RE = re.compile(r'\s*,\s*')
+
 
 class ResourceControlInjector:
     """Injects query hints to control CPU and memory usage."""
@@ -44,62 +49,45 @@ class ResourceControlInjector:
             Modified query with resource hints
         """
         try:
-            # Check if query already has OPTION clause
-            query_upper = query.upper().strip()
-            
             # Remove trailing semicolon if present
             query_clean = query.rstrip(';').strip()
             
-            # Check if OPTION clause already exists
-            # Use regex to find OPTION clause (case-insensitive)
-            option_pattern = r'\bOPTION\s*\([^)]*\)\s*;?\s*$'
-            has_option = bool(re.search(option_pattern, query_upper, re.IGNORECASE))
+            # Check if OPTION clause already exists (pattern is case-insensitive,
+            # so no upper-cased copy of the query is needed)
+            option_match = _OPTION_CLAUSE_RE.search(query_clean)
             
-            if has_option:
+            if option_match:
                 # Query already has OPTION clause - we'll append to it
-                # Extract existing OPTION content
-                option_match = re.search(option_pattern, query_upper, re.IGNORECASE)
-                if option_match:
-                    # Remove existing OPTION clause and append new one with merged hints
-                    query_without_option = re.sub(option_pattern, '', query_clean, flags=re.IGNORECASE).strip()
-                    
-                    # Extract existing hints from OPTION clause
-                    existing_option = option_match.group(0)
-                    existing_hints = []
-                    
-                    # Parse existing hints (simple extraction)
-                    option_content = re.search(r'OPTION\s*\((.*?)\)', existing_option, re.IGNORECASE)
-                    if option_content:
-                        existing_hints_str = option_content.group(1)
-                        # Split by comma and clean
-                        existing_hints = [h.strip() for h in existing_hints_str.split(',')]
-                    
-                    # Build new hints list
-                    hints = []
-                    
-                    # Check if MAXDOP already exists
-                    has_maxdop = any('MAXDOP' in h.upper() for h in existing_hints)
-                    if not has_maxdop:
-                        hints.append(f"MAXDOP {maxdop}")
-                    
-                    # Check if MAX_GRANT_PERCENT already exists
-                    has_max_grant = any('MAX_GRANT_PERCENT' in h.upper() for h in existing_hints)
-                    if not has_max_grant:
-                        hints.append(f"MAX_GRANT_PERCENT = {max_grant_percent}")
-                    
-                    if hints:
-                        # Merge with existing hints
-                        all_hints = existing_hints + hints
-                        hints_str = ", ".join(all_hints)
-                        modified_query = query_without_option + f" OPTION ({hints_str})"
-                    else:
-                        # No new hints to add, return original
-                        modified_query = query
+                # Remove existing OPTION clause and append new one with merged hints
+                query_without_option = query_clean[:option_match.start()].strip()
+                
+                # Extract existing hints from OPTION clause (empty entries dropped,
+                # so "OPTION ()" doesn't produce a leading comma)
+                existing_hints_str = option_match.group(1).strip()
+                existing_hints = [h for h in _HINT_SPLIT_RE.split(existing_hints_str) if h]
+                existing_hints_upper = existing_hints_str.upper()
+                
+                # Build new hints list
+                hints = []
+                
+                # Check if MAXDOP already exists
+                has_maxdop = 'MAXDOP' in existing_hints_upper
+                if not has_maxdop:
+                    hints.append(f"MAXDOP {maxdop}")
+                
+                # Check if MAX_GRANT_PERCENT already exists
+                has_max_grant = 'MAX_GRANT_PERCENT' in existing_hints_upper
+                if not has_max_grant:
+                    hints.append(f"MAX_GRANT_PERCENT = {max_grant_percent}")
+                
+                if hints:
+                    # Merge with existing hints
+                    all_hints = existing_hints + hints
+                    hints_str = ", ".join(all_hints)
+                    modified_query = query_without_option + f" OPTION ({hints_str})"
                 else:
-                    # Couldn't parse existing OPTION, append new OPTION clause
-                    hints = [f"MAXDOP {maxdop}", f"MAX_GRANT_PERCENT = {max_grant_percent}"]
-                    hints_str = ", ".join(hints)
-                    modified_query = query_clean + f" OPTION ({hints_str})"
+                    # No new hints to add, return original
+                    modified_query = query
             else:
                 # No OPTION clause exists, append new one
                 hints = [f"MAXDOP {maxdop}", f"MAX_GRANT_PERCENT = {max_grant_percent}"]
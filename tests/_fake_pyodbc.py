@@ -0,0 +1,90 @@
+"""
+Minimal stand-in for the pyodbc module in unit tests.
+
+Plain classes instead of a MagicMock: attribute access doesn't grow mock trees,
+and the exception types are real, so `except pyodbc.Error` behaves as it does
+against the driver. Tests needing connection behaviour patch `connect` or pass
+their own mocks.
+"""
+
+SQL_WCHAR = -8
+
+
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class Cursor:
+    description = None
+    arraysize = 1
+    timeout = 0
+
+    def __init__(self, connection=None):
+        self.connection = connection
+
+    def execute(self, sql, *params):
+        if self.connection is not None:
+            self.connection.executed.append(sql)
+        return self
+
+    def fetchone(self):
+        return None
+
+    def fetchmany(self, size=None):
+        return []
+
+    def fetchall(self):
+        return []
+
+    def nextset(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class Connection:
+    """Records the session setup applied to it, so tests can assert on it."""
+
+    def __init__(self, connstring="", autocommit=False):
+        self.connstring = connstring
+        self.autocommit = autocommit
+        self.timeout = 0  # query timeout in seconds; 0 means none, as in pyodbc
+        self.decoding = {}
+        self.encoding = None
+        self.executed = []
+        self.closed = False
+
+    def cursor(self):
+        return Cursor(self)
+
+    def setdecoding(self, sqltype, encoding=None, ctype=None):
+        self.decoding[sqltype] = encoding
+
+    def setencoding(self, encoding=None, ctype=None):
+        self.encoding = encoding
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def connect(connstring="", autocommit=False, timeout=0, **kwargs):
+    return Connection(connstring, autocommit=autocommit)
@@ -8,14 +8,12 @@ import os
 # Ensure project root is in python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-# Mock pyodbc globally before any application imports
+# Replace pyodbc globally before any application imports
 from unittest.mock import MagicMock
-sys.modules["pyodbc"] = MagicMock()
+from tests import _fake_pyodbc
+sys.modules["pyodbc"] = _fake_pyodbc
 
-@pytest.fixture
-def mock_config():
-    """Mock configuration for tests."""
-    from unittest.mock import MagicMock
+def _build_mock_config():
     config = MagicMock()
     config.best_practices.enforce_no_select_star = True
     config.safety.risk_weights.cross_join = 35
@@ -25,3 +23,13 @@ def mock_config():
     config.safety.risk_weights.dynamic_sql = 85
     # Add other needed config values
     return config
+
+@pytest.fixture
+def mock_config():
+    """Mock configuration for tests."""
+    return _build_mock_config()
+
+@pytest.fixture(scope="module")
+def module_mock_config():
+    """Mock configuration shared by a module; for fixtures that only read it."""
+    return _build_mock_config()
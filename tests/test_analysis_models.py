@@ -29,6 +29,16 @@ def test_finding_model_creation():
     assert json_data["code"] == "BP001"
     assert json_data["severity"] == "HIGH"
 
+def test_finding_is_frozen():
+    """Test findings are immutable and hashable (usable for de-duplication)."""
+    kwargs = dict(code="BP001", severity="HIGH", category="PERFORMANCE",
+                  title="T", description="D", recommendation="R")
+    finding = Finding(**kwargs)
+    
+    with pytest.raises(ValueError):
+        finding.severity = "LOW"
+    assert len({finding, Finding(**kwargs)}) == 1
+
 def test_review_result_structure():
     """Test the full structure of ReviewResult."""
     result = ReviewResult(
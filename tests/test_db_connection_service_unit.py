@@ -3,11 +3,11 @@ Unit tests for DbConnectionService and ConnectionStringBuilder.
 Tests connection pooling, retry logic, and secure string generation.
 """
 import pytest
-from unittest.mock import Mock, MagicMock, patch
+from unittest.mock import Mock, MagicMock, patch, ANY
 from pydantic import SecretStr
 from services.infrastructure.db_connection_service import DbConnectionService, _CONNECTION_POOLS, _CIRCUIT_STATE, SimpleConnectionPool
 from services.infrastructure.connection_string_builder import ConnectionStringBuilder
-from services.common.exceptions import DatabaseError, ConfigurationError
+from services.common.exceptions import DatabaseError, ConfigurationError, ValidationError
 import services.infrastructure.db_connection_service as db_service_module
 import time
 from queue import Empty
@@ -67,8 +67,10 @@ class TestDbConnectionServiceUnit:
         config_mock.environment = "Prd"
         config_mock.database.connection_pool_size = 5
         config_mock.database.connection_timeout_seconds = 30
+        config_mock.database.connection_idle_timeout_seconds = 300
         config_mock.database.command_timeout_seconds = 60
         config_mock.database.max_command_timeout_seconds = 300
+        config_mock.database.cursor_arraysize = 1000
         config_mock.database.app_name = "TestApp"
         
         # Setup legacy connection string for simplicity in basic tests
@@ -87,6 +89,28 @@ class TestDbConnectionServiceUnit:
             service = DbConnectionService()
             return service
 
+    @pytest.fixture
+    def fake_driver_service(self, mock_config):
+        """Service running against the conftest fake pyodbc module (no patching)."""
+        _CONNECTION_POOLS.clear()
+        _CIRCUIT_STATE["failures"] = 0
+        _CIRCUIT_STATE["is_open"] = False
+        with patch('services.infrastructure.db_connection_service.get_config', return_value=mock_config):
+            yield DbConnectionService()
+        _CONNECTION_POOLS.clear()
+
+    def test_connection_setup_against_fake_driver(self, fake_driver_service):
+        """Test a new connection gets autocommit, session options and a command timeout."""
+        with fake_driver_service.acquire() as conn:
+            assert conn.autocommit is True
+            assert conn.executed[0].startswith("SET NOCOUNT ON;")
+
+        # The fake cursor has no description, so this takes the commit() path
+        assert fake_driver_service.execute_query("SELECT 42") is None
+        assert conn.timeout == 60
+        assert "SELECT 42" in conn.executed
+        assert not conn.closed  # handed back to the pool, not closed
+
     def test_get_connection_success(self, service, mock_pyodbc):
         """Test successful connection."""
         mock_conn = MagicMock()
@@ -95,10 +119,14 @@ class TestDbConnectionServiceUnit:
         
         with service.get_connection(env="Prd") as conn:
             assert conn is mock_conn
-            # Verify default safety settings applied
+            # Verify default safety settings applied in a single batch
             cursor = conn.cursor.return_value
-            cursor.execute.assert_any_call("SET NOCOUNT ON")
-            cursor.execute.assert_any_call("SET XACT_ABORT ON")
+            settings_batch = cursor.execute.call_args_list[0][0][0]
+            assert "SET NOCOUNT ON;" in settings_batch
+            assert "SET XACT_ABORT ON;" in settings_batch
+            assert "SET LOCK_TIMEOUT 30000;" in settings_batch
+            assert "SET ARITHABORT ON;" in settings_batch
+            mock_pyodbc.connect.assert_called_once_with(ANY, timeout=30, autocommit=True)
 
     def test_connection_pool_creation(self, service, mock_pyodbc):
         """Test that pool is created and reused."""
@@ -211,11 +239,22 @@ class TestDbConnectionServiceUnit:
         assert result is None
         mock_conn.commit.assert_called()
 
+    def test_execute_query_with_params(self, service):
+        """Test params are bound by the driver rather than inlined."""
+        mock_conn = MagicMock()
+        service.get_connection = MagicMock(return_value=mock_conn)
+        cursor = mock_conn.cursor.return_value
+        cursor.description = None
+
+        service.execute_query("SELECT a FROM T ORDER BY a OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", env="Prd", params=[20, 10])
+
+        cursor.execute.assert_any_call("SELECT a FROM T ORDER BY a OFFSET ? ROWS FETCH NEXT ? ROWS ONLY", 20, 10)
+
     def test_circuit_breaker_reset(self, service):
         """Test circuit breaker reset after timeout."""
         _CIRCUIT_STATE["failures"] = 5
         _CIRCUIT_STATE["is_open"] = True
-        _CIRCUIT_STATE["last_failure_time"] = 0 # Epoch 0
+        _CIRCUIT_STATE["last_failure_time"] = time.monotonic() - 3600 # Failed an hour ago
         
         # Should NOT raise error and reset state
         with patch.object(service, '_get_connection_string', return_value="conn_str"), \
@@ -260,6 +299,15 @@ class TestDbConnectionServiceUnit:
         result_db = service._get_connection_string("Prd", db="NewDB")
         assert "Database=NewDB" in result_db
 
+    @pytest.mark.parametrize("db", ["Sales;Uid=sa", "Sales}", "x=1", "a" * 129])
+    def test_get_connection_string_rejects_unsafe_database(self, service, mock_config, db):
+        """Test database names that could inject connection string keywords are rejected."""
+        mock_config.database.connection_components = {}
+        mock_config.database.connection_strings = {"Prd": SecretStr("LegacyString")}
+        
+        with pytest.raises(ValidationError):
+            service._get_connection_string("Prd", db=db)
+
 
     @patch('services.infrastructure.db_connection_service.SimpleConnectionPool')
     def test_execute_query_timeout_cap(self, MockPool, service, mock_config, mock_pyodbc):
@@ -299,6 +347,35 @@ class TestDbConnectionServiceUnit:
         assert "Database error" in str(exc.value)
         assert "DB Failure" in str(exc.value)
 
+    def test_acquire_returns_connection_to_pool(self, service):
+        """Test acquire() hands the connection back to its pool on a clean exit."""
+        mock_conn = MagicMock()
+        mock_pool = MagicMock()
+        service.get_connection = MagicMock(return_value=mock_conn)
+
+        with patch.object(service, '_get_connection_string', return_value="conn_str"), \
+             patch('services.infrastructure.db_connection_service.get_pool', return_value=mock_pool):
+            with service.acquire() as conn:
+                assert conn is mock_conn
+
+        mock_pool.return_connection.assert_called_once_with(mock_conn)
+        mock_pool._discard_connection.assert_not_called()
+
+    def test_acquire_discards_connection_on_error(self, service):
+        """Test acquire() never pools a connection whose block raised."""
+        mock_conn = MagicMock()
+        mock_pool = MagicMock()
+        service.get_connection = MagicMock(return_value=mock_conn)
+
+        with patch.object(service, '_get_connection_string', return_value="conn_str"), \
+             patch('services.infrastructure.db_connection_service.get_pool', return_value=mock_pool):
+            with pytest.raises(ValueError):
+                with service.acquire():
+                    raise ValueError("boom")
+
+        mock_pool._discard_connection.assert_called_once_with(mock_conn)
+        mock_pool.return_connection.assert_not_called()
+
     def test_default_fetch_fallback(self):
         """Test default fetch when fetchall is missing."""
         cursor = MagicMock()
@@ -372,6 +449,33 @@ class TestSimpleConnectionPool:
         assert conn2 is good_conn
         factory.assert_called_once() # No new creation
 
+    def test_pool_idle_expiry(self):
+        """Test connections idle past idle_timeout are replaced instead of reused."""
+        pool = SimpleConnectionPool("test_key", max_size=1, idle_timeout=0)
+        stale_conn = MagicMock()
+        fresh_conn = MagicMock()
+        factory = MagicMock(side_effect=[stale_conn, fresh_conn])
+
+        pool.return_connection(pool.get_connection(factory))
+        time.sleep(0.01)
+
+        assert pool.get_connection(factory) is fresh_conn
+        stale_conn.close.assert_called_once()
+        assert pool.current_count == 1
+
+    def test_pool_return_skips_rollback_in_autocommit(self):
+        """Test rollback is only issued for connections with transactions enabled."""
+        pool = SimpleConnectionPool("test_key", max_size=2)
+        auto_conn = MagicMock(autocommit=True)
+        txn_conn = MagicMock(autocommit=False)
+
+        pool.return_connection(auto_conn)
+        pool.return_connection(txn_conn)
+
+        auto_conn.rollback.assert_not_called()
+        txn_conn.rollback.assert_called_once()
+        assert pool.pool.qsize() == 2
+
     def test_discard_connection_error(self):
         """Test graceful discard when close fails."""
         pool = SimpleConnectionPool("test_key", max_size=1)
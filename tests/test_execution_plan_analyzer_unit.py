@@ -0,0 +1,54 @@
+"""
+Unit tests for ExecutionPlanAnalyzer.
+Tests detection of plan operators from showplan XML.
+"""
+import pytest
+from services.analysis.execution_plan_analyzer import ExecutionPlanAnalyzer
+
+PLAN_TEMPLATE = """<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan">
+  <BatchSequence><Batch><Statements><StmtSimple>
+    <QueryPlan>
+      <MissingIndexes><MissingIndexGroup Impact="87.5"/></MissingIndexes>
+      {ops}
+    </QueryPlan>
+  </StmtSimple></Statements></Batch></BatchSequence>
+</ShowPlanXML>"""
+
+
+class TestExecutionPlanAnalyzerUnit:
+    @pytest.fixture
+    def analyzer(self):
+        return ExecutionPlanAnalyzer()
+
+    def test_empty_plan(self, analyzer):
+        """Test empty or invalid XML yields no violations."""
+        assert analyzer.analyze_plan("") == []
+        assert analyzer.analyze_plan("<not-xml") == []
+
+    def test_detects_operators(self, analyzer):
+        """Test each operator type is reported from a single plan."""
+        ops = """
+        <RelOp PhysicalOp="Table Scan"><TableScan/></RelOp>
+        <RelOp PhysicalOp="Index Scan">
+          <IndexScan><Object Schema="[dbo]" Table="[Users]"/></IndexScan>
+        </RelOp>
+        <RelOp PhysicalOp="Sort" EstimatedTotalSubtreeCost="4.2"/>
+        <RelOp PhysicalOp="Hash Match"/>
+        <RelOp PhysicalOp="Key Lookup"/>
+        <RelOp PhysicalOp="Compute Scalar" EstimateRows="1" ActualRows="500">
+          <ScalarOperator ScalarString="CONVERT_IMPLICIT(int,[a],0)"/>
+        </RelOp>
+        """
+        violations = analyzer.analyze_plan(PLAN_TEMPLATE.format(ops=ops))
+        codes = {v.split(":")[0] for v in violations}
+
+        assert codes == {"BP023", "BP024", "BP025", "BP026", "BP028", "BP029", "BP030", "BP031"}
+        assert any("[dbo].[Users]" in v for v in violations if v.startswith("BP025"))
+
+    def test_parallelism_threshold(self, analyzer):
+        """Test parallelism is only reported above three operators."""
+        three = '<RelOp PhysicalOp="Parallelism"/>' * 3
+        four = '<RelOp PhysicalOp="Parallelism"/>' * 4
+
+        assert not any(v.startswith("BP027") for v in analyzer.analyze_plan(PLAN_TEMPLATE.format(ops=three)))
+        assert any(v.startswith("BP027") for v in analyzer.analyze_plan(PLAN_TEMPLATE.format(ops=four)))
@@ -1,6 +1,9 @@
 """
 Unit tests for ExecutionService.
 """
+import datetime
+import decimal
+import time
 import pytest
 from unittest.mock import Mock, MagicMock, patch, ANY
 from services.core.execution_service import ExecutionService
@@ -31,6 +34,9 @@ class TestExecutionServiceUnit:
         config_mock.safety.max_concurrent_queries_per_user = 2
         config_mock.safety.max_payload_size_mb = 1  # 1MB default
         config_mock.safety.max_payload_size_bytes = 10 * 1024 * 1024 # 10MB default (legacy)
+        config_mock.database.cursor_arraysize = 1000
+        config_mock.database.plan_cache_size = 16
+        config_mock.database.plan_cache_ttl_seconds = 60
         # Resource control hints (disabled by default for tests)
         config_mock.safety.enable_resource_hints = False
         config_mock.safety.maxdop = 1
@@ -67,27 +73,52 @@ class TestExecutionServiceUnit:
             
             return service
 
-    def test_get_execution_plan_success(self, service):
+    @pytest.fixture
+    def plan_conn(self, service):
+        conn = MagicMock()
+        service.db.acquire.return_value.__enter__.return_value = conn
+        return conn
+
+    @pytest.fixture
+    def plan_cursor(self, plan_conn):
+        cursor = MagicMock()
+        plan_conn.cursor.return_value = cursor
+        return cursor
+
+    def test_get_execution_plan_success(self, service, plan_cursor):
         """Test successful execution plan retrieval."""
-        service.db.execute_query.return_value = "<Plan/>"
+        plan_cursor.fetchall.return_value = [("<Plan/>",)]
         
         result = service.get_execution_plan("SELECT 1")
         
         assert result["success"] is True
         assert result["plan_xml"] == "<Plan/>"
-        # Verify wrapper SQL
-        call_args = service.db.execute_query.call_args
-        assert "SET SHOWPLAN_XML ON" in call_args[0][0]
+        # SHOWPLAN toggles are sent as their own batches around the query
+        assert [c.args[0] for c in plan_cursor.execute.call_args_list] == [
+            "SET SHOWPLAN_XML ON", "SELECT 1", "SET SHOWPLAN_XML OFF"
+        ]
+        service.db.acquire.assert_called_once_with("Prd", None)
+
+    def test_get_execution_plan_sets_command_timeout(self, service, plan_conn, plan_cursor, mock_config):
+        """Test the plan connection gets the configured command timeout."""
+        mock_config.database.command_timeout_seconds = 45
+        plan_cursor.fetchall.return_value = [("<Plan/>",)]
 
-    def test_get_execution_plan_failure(self, service):
+        service.get_execution_plan("SELECT 2")
+
+        assert plan_conn.timeout == 45
+
+    def test_get_execution_plan_failure(self, service, plan_cursor):
         """Test failure in execution plan retrieval."""
-        service.db.execute_query.side_effect = Exception("DB Error")
+        plan_cursor.execute.side_effect = [None, Exception("DB Error"), None]
         
         result = service.get_execution_plan("SELECT 1")
         
         assert result["success"] is False
         assert "element" in result or "error" in result # "error" field likely
         assert "Failed to get execution plan" in result["error"]
+        # SHOWPLAN is switched off even when the query fails
+        assert plan_cursor.execute.call_args_list[-1].args[0] == "SET SHOWPLAN_XML OFF"
 
     def test_execute_readonly_security_check(self, service):
         """Test that validation failure blocks execution."""
@@ -99,6 +130,22 @@ class TestExecutionServiceUnit:
         assert "Security Violation" in result["error"]
         service.db.execute_query.assert_not_called()
 
+    def test_execute_readonly_allowed_databases(self, mock_db_connection, mock_analyzer, mock_config):
+        """Test the allowed-database check is case-insensitive and blocks other databases."""
+        mock_config.safety.allowed_databases = ["Sales", "Reporting"]
+        with patch('services.core.execution_service.DbConnectionService', return_value=mock_db_connection), \
+             patch('services.core.execution_service.SqlAnalyzer', return_value=mock_analyzer), \
+             patch('services.core.execution_service.get_config', return_value=mock_config):
+            service = ExecutionService()
+        service.analyzer.validate_readonly.return_value = (True, None)
+        
+        result = service.execute_readonly("SELECT 1", database="HR")
+        assert result["success"] is False
+        assert "not in the allowed list" in result["error"]
+        mock_db_connection.execute_query.assert_not_called()
+        
+        assert service._allowed_databases == frozenset({"sales", "reporting"})
+
     def test_execute_readonly_success(self, service):
         """Test successful execution flow."""
         service.analyzer.validate_readonly.return_value = (True, None)
@@ -125,7 +172,7 @@ class TestExecutionServiceUnit:
         mock_cursor.fetchmany.side_effect = [[(long_string,)], []] 
         
         # Side effect to invoke the callback
-        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None):
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
             return fetch_method(mock_cursor, None)
             
         mock_db_connection.execute_query.side_effect = side_effect_execute
@@ -149,7 +196,7 @@ class TestExecutionServiceUnit:
         mock_cursor.description = [("col_huge",)]
         mock_cursor.fetchmany.side_effect = [[(huge_string,)], []]
         
-        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None):
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
             fetch_method(mock_cursor, None)
             
         mock_db_connection.execute_query.side_effect = side_effect_execute
@@ -221,7 +268,7 @@ class TestExecutionServiceUnit:
         # So we return 1 batch of 3 rows (exceeds 2)
         mock_cursor.fetchmany.side_effect = [[(1,), (2,), (3,)], []]
         
-        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None):
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
             return fetch_method(mock_cursor, None)
             
         mock_db_connection.execute_query.side_effect = side_effect_execute
@@ -232,6 +279,71 @@ class TestExecutionServiceUnit:
         
         assert len(result["data"]) == 2
 
+    def test_fetch_batches_capped_by_remaining_rows(self, service, mock_db_connection, mock_config):
+        """Test that fetchmany never requests more rows than max_rows allows."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+        mock_config.safety.max_rows = 5
+        mock_config.database.cursor_arraysize = 3
+
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("col",)]
+        mock_cursor.fetchmany.side_effect = [[(1,), (2,), (3,)], [(4,), (5,)], []]
+
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
+            return fetch_method(mock_cursor, None)
+
+        mock_db_connection.execute_query.side_effect = side_effect_execute
+
+        result = service.execute_readonly("SELECT * FROM T")
+
+        assert result["row_count"] == 5
+        assert [c.args[0] for c in mock_cursor.fetchmany.call_args_list] == [3, 2]
+
+    def test_row_limit_pushed_to_server(self, service):
+        """Test TOP max_rows is added to unbounded SELECTs only."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+        service.db.execute_query.return_value = []
+
+        service.execute_readonly("SELECT * FROM T")
+        assert "SELECT TOP (100) * FROM T" in service.db.execute_query.call_args[0][0]
+
+        service.execute_readonly("SELECT TOP 5 * FROM T")
+        assert "TOP 5" in service.db.execute_query.call_args[0][0]
+        assert "TOP (100)" not in service.db.execute_query.call_args[0][0]
+
+    def test_row_limit_skips_non_select(self, service):
+        """Test row limit leaves unions and unparseable queries untouched."""
+        union = "SELECT a FROM T UNION SELECT b FROM U"
+        assert service._apply_row_limit(union, 100) == union
+        assert service._apply_row_limit("SELECT * FORM T", 100) == "SELECT * FORM T"
+        cte = "WITH c AS (SELECT 1 AS a) SELECT a FROM c"
+        assert service._apply_row_limit(cte, 100) == cte
+
+    def test_row_limit_keeps_original_text(self, service):
+        """Test TOP is spliced in without regenerating (and so rewriting) the query."""
+        query = "select distinct ISNULL(a, 0) AS a /* keep */ FROM dbo.T WHERE b = N'x'"
+        assert service._apply_row_limit(query, 100) == (
+            "select distinct TOP (100) ISNULL(a, 0) AS a /* keep */ FROM dbo.T WHERE b = N'x'"
+        )
+        assert service._apply_row_limit("  -- note\nSELECT a FROM T", 5) == "  -- note\nSELECT TOP (5) a FROM T"
+
+    def test_pagination_parameterized(self, service):
+        """Test pagination executes OFFSET/FETCH as bound parameters."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+        service.db.execute_query.return_value = []
+
+        result = service.execute_readonly("SELECT a FROM T ORDER BY a", page_size=10, page=3)
+
+        assert result["success"] is True
+        call = service.db.execute_query.call_args
+        assert call[0][0] == "SELECT a FROM T ORDER BY a OFFSET ? ROWS FETCH NEXT ? ROWS ONLY"
+        assert call.kwargs["params"] == [20, 10]
+
+    def test_apply_pagination_literal(self, service):
+        """Test literal pagination (used for review and cost checks) includes FETCH."""
+        paged = service._apply_pagination("SELECT a FROM T", 10, 3)
+        assert paged == "SELECT a FROM T ORDER BY 1 OFFSET 20 ROWS FETCH NEXT 10 ROWS ONLY"
+
     def test_concurrency_error_handling(self, service):
         """Test handling of concurrency limits."""
         # Mock acquire to raise error
@@ -252,7 +364,7 @@ class TestExecutionServiceUnit:
         mock_cursor.description = [("num",)]
         mock_cursor.fetchmany.side_effect = [[(123,), (456,)], []]
         
-        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None):
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
             return fetch_method(mock_cursor, None)
             
         mock_db_connection.execute_query.side_effect = side_effect_execute
@@ -261,19 +373,133 @@ class TestExecutionServiceUnit:
         assert result["success"] is True
         assert result["data"] == [{"num": 123}, {"num": 456}]
 
-    def test_execution_plan_fetching_logic(self, service):
-        """Test the fetch_plan helper function details."""
-        # We need to extract the inner function `fetch_plan` or verify logic via side effect
-        # Logic: Concatenates row[0] if present
-        
-        # Mock execute_query to run the callback with specific data
-        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None):
-            mock_cursor = MagicMock()
-            # Rows: [("Part1",), ("Part2",), (None,)]
-            mock_cursor.fetchall.return_value = [("Part1",), ("Part2",), (None,)]
+    def test_columnar_result_format(self, service, mock_db_connection):
+        """Test columnar format returns column names once and value lists."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("id",), ("name",)]
+        mock_cursor.fetchmany.side_effect = [[(1, "a"), (2, "b" * 2000)], []]
+
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
             return fetch_method(mock_cursor, None)
-            
-        service.db.execute_query.side_effect = side_effect_execute
+
+        mock_db_connection.execute_query.side_effect = side_effect_execute
+
+        result = service.execute_readonly("SELECT id, name FROM T", result_format="columnar")
+
+        assert result["success"] is True
+        assert result["row_count"] == 2
+        assert result["data"]["columns"] == ["id", "name"]
+        assert result["data"]["rows"][0] == [1, "a"]
+        assert result["data"]["rows"][1][1].endswith("...(truncated)")
+
+    def test_column_major_result_format(self, service, mock_db_connection):
+        """Test column_major format returns one value list per column."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("id",), ("name",)]
+        mock_cursor.fetchmany.side_effect = [[(1, "a"), (2, "b")], []]
+
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
+            return fetch_method(mock_cursor, None)
+
+        mock_db_connection.execute_query.side_effect = side_effect_execute
+
+        result = service.execute_readonly("SELECT id, name FROM T", result_format="column_major")
+
+        assert result["row_count"] == 2
+        assert result["data"] == {"columns": ["id", "name"], "column_data": [[1, 2], ["a", "b"]]}
+
+    def test_column_major_empty_result(self, service):
+        """Test column_major keeps one (empty) list per column when no rows match."""
+        formatted = service._format_result([], ["id", "name"], "column_major")
+        assert formatted == {"columns": ["id", "name"], "column_data": [[], []]}
+
+    def test_invalid_result_format(self, service):
+        """Test unknown result_format is rejected before execution."""
+        result = service.execute_readonly("SELECT 1", result_format="arrow")
+
+        assert result["success"] is False
+        assert "result_format" in result["error"]
+        service.db.execute_query.assert_not_called()
+
+    def test_non_json_values_serialized(self, service, mock_db_connection):
+        """Test datetime, Decimal and binary values are converted to JSON-safe forms."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("ts",), ("amount",), ("blob",), ("n",)]
+        mock_cursor.fetchmany.side_effect = [[
+            (datetime.datetime(2024, 1, 2, 3, 4, 5), decimal.Decimal("12.50"), b"\x01\xab", 7)
+        ], []]
+
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
+            return fetch_method(mock_cursor, None)
+
+        mock_db_connection.execute_query.side_effect = side_effect_execute
+
+        result = service.execute_readonly("SELECT * FROM T")
+
+        assert result["data"] == [{"ts": "2024-01-02T03:04:05", "amount": "12.50", "blob": "0x01AB", "n": 7}]
+
+    def test_large_binary_value_truncated_and_counted(self, service, mock_db_connection):
+        """Test a serialized blob is truncated like text and counts toward the payload limit."""
+        service.analyzer.validate_readonly.return_value = (True, None)
+        service.config.safety.max_payload_size_mb = 0.001  # ~1KB
+
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("blob",)]
+        mock_cursor.fetchmany.side_effect = [[(b"\xff" * 600,)], []]
+
+        def side_effect_execute(query, env=None, db=None, fetch_method=None, command_timeout=None, params=None):
+            return fetch_method(mock_cursor, None)
+
+        mock_db_connection.execute_query.side_effect = side_effect_execute
+
+        result = service.execute_readonly("SELECT blob FROM T")
+        assert result["success"] is False
+        assert "too large" in result["error"]
+
+        service.config.safety.max_payload_size_mb = 10
+        mock_cursor.fetchmany.side_effect = [[(b"\xff" * 600,)], []]
+        result = service.execute_readonly("SELECT blob FROM T")
+        blob = result["data"][0]["blob"]
+        assert blob.startswith("0xFFFF") and blob.endswith("...(truncated)")
+        assert len(blob) == 1000 + len("...(truncated)")
+
+    def test_execution_plan_cached_per_query(self, service, plan_cursor):
+        """Test a repeated plan request is served from cache until it expires."""
+        plan_cursor.fetchall.return_value = [("<Plan/>",)]
+        
+        first = service.get_execution_plan("SELECT 1", env="Int", database="Sales")
+        first["plan_xml"] = "mutated by caller"
+        second = service.get_execution_plan("SELECT 1", env="Int", database="Sales")
+        
+        assert second["plan_xml"] == "<Plan/>"
+        assert service.db.acquire.call_count == 1
+        
+        # Different database is a different plan
+        service.get_execution_plan("SELECT 1", env="Int", database="Other")
+        assert service.db.acquire.call_count == 2
+        
+        with patch('services.common.ttl_cache.time.monotonic', return_value=time.monotonic() + 3600):
+            service.get_execution_plan("SELECT 1", env="Int", database="Sales")
+        assert service.db.acquire.call_count == 3
+
+    def test_execution_plan_failure_not_cached(self, service, plan_cursor):
+        """Test failed plan requests are retried rather than cached."""
+        plan_cursor.execute.side_effect = [None, Exception("DB Error"), None]
+        assert service.get_execution_plan("SELECT 1")["success"] is False
+        
+        plan_cursor.execute.side_effect = None
+        plan_cursor.fetchall.return_value = [("<Plan/>",)]
+        assert service.get_execution_plan("SELECT 1")["success"] is True
+
+    def test_execution_plan_fetching_logic(self, service, plan_cursor):
+        """Test plan XML split across rows is joined and empty rows skipped."""
+        plan_cursor.fetchall.return_value = [("Part1",), ("Part2",), (None,)]
         
         result = service.get_execution_plan("SELECT 1")
         
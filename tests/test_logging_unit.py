@@ -0,0 +1,67 @@
+"""
+Unit tests for logging configuration.
+"""
+import json
+import logging
+import pytest
+import structlog
+from services.common import logging as app_logging
+
+
+class TestLoggingUnit:
+    @pytest.fixture(autouse=True)
+    def restore_logging(self):
+        yield
+        app_logging._stop_listener()
+        structlog.reset_defaults()
+        logging.basicConfig(force=True)
+
+    def test_records_written_by_background_listener(self, capsys):
+        """Test structlog and stdlib records reach stdout through the queue."""
+        app_logging.configure_logging(log_level="INFO", json_format=True)
+
+        structlog.get_logger().info("query_executed", row_count=3)
+        structlog.get_logger().debug("filtered_out")
+        logging.getLogger("third_party").warning("library message")
+
+        # Stopping the listener drains everything still queued
+        app_logging._stop_listener()
+        lines = capsys.readouterr().out.splitlines()
+
+        event = json.loads(lines[0])
+        assert event["event"] == "query_executed"
+        assert event["row_count"] == 3
+        assert lines[1] == "library message"
+        assert len(lines) == 2
+
+    def test_json_renderer_handles_non_json_values(self, capsys):
+        """Test the orjson-backed renderer falls back to repr for unknown types."""
+        app_logging.configure_logging(log_level="INFO", json_format=True)
+
+        structlog.get_logger().info("plan_fetched", payload=object(), ratio=0.5)
+        app_logging._stop_listener()
+
+        event = json.loads(capsys.readouterr().out.splitlines()[0])
+        assert event["ratio"] == 0.5
+        assert event["payload"].startswith("<object object")
+
+    def test_json_renderer_handles_values_orjson_rejects(self, capsys):
+        """Test non-str keys and integers over 64 bits still render."""
+        app_logging.configure_logging(log_level="INFO", json_format=True)
+
+        structlog.get_logger().info("row_counts", by_partition={1: 2})
+        structlog.get_logger().info("big_value", value=2**70)
+        app_logging._stop_listener()
+
+        lines = capsys.readouterr().out.splitlines()
+        assert json.loads(lines[0])["by_partition"] == {"1": 2}
+        assert json.loads(lines[1])["value"] == 2**70
+
+    def test_reconfigure_replaces_listener(self):
+        """Test calling configure_logging twice leaves a single running listener."""
+        app_logging.configure_logging()
+        first = app_logging._LISTENER
+        app_logging.configure_logging()
+
+        assert app_logging._LISTENER is not first
+        assert first._thread is None
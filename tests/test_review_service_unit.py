@@ -0,0 +1,63 @@
+"""
+Unit tests for ReviewService.
+Tests orchestration of plan and metadata analysis.
+"""
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from services.analysis.review_service import ReviewService
+from services.analysis.models import (
+    ReviewResult, ReviewSummary, SafetyChecks, PerformanceInsights, SchemaContext
+)
+
+
+def _clean_result() -> ReviewResult:
+    return ReviewResult(
+        summary=ReviewSummary(status="APPROVED", risk_score=0, verdict="ok", top_severity="LOW"),
+        safety_checks=SafetyChecks(is_readonly=True, has_write_ops=False, has_ddl=False),
+        issues=[],
+        performance_insights=PerformanceInsights(execution_plan_available=False),
+        schema_context=SchemaContext(),
+    )
+
+
+class TestReviewServiceUnit:
+    @pytest.fixture
+    def service(self):
+        analyzer = MagicMock()
+        analyzer.analyze.return_value = _clean_result()
+        execution_service = MagicMock()
+        execution_service.get_execution_plan.return_value = {"success": False}
+        return ReviewService(sql_analyzer=analyzer, execution_service=execution_service)
+
+    def test_metadata_runs_concurrently_with_plan(self, service):
+        """Test metadata analysis overlaps plan retrieval and findings keep a fixed order."""
+        metadata_started = threading.Event()
+
+        def slow_plan(sql, env, database):
+            # Only returns once metadata analysis has started on another thread
+            assert metadata_started.wait(timeout=5)
+            return {"success": True, "plan_xml": "<plan/>"}
+
+        def analyze_metadata(env=None, database=None):
+            metadata_started.set()
+            return ["BP040: Heap table"]
+
+        service.execution_service.get_execution_plan.side_effect = slow_plan
+        with patch('services.analysis.metadata_analyzer.MetadataAnalyzer') as MockMeta, \
+             patch('services.analysis.execution_plan_analyzer.ExecutionPlanAnalyzer') as MockPlan:
+            MockMeta.return_value.analyze_metadata.side_effect = analyze_metadata
+            MockPlan.return_value.analyze_plan.return_value = ["BP024: Table scan detected on 'dbo.T'."]
+
+            result = service.review("SELECT * FROM dbo.T", env="Int")
+
+        assert [i["code"] for i in result["issues"]] == ["PLAN001", "META001"]
+        assert result["performance_insights"]["execution_plan_available"] is True
+
+    def test_metadata_failure_does_not_fail_review(self, service):
+        """Test a metadata error is logged and the review still completes."""
+        with patch('services.analysis.metadata_analyzer.MetadataAnalyzer', side_effect=Exception("DMV Failed")):
+            result = service.review("SELECT 1")
+
+        assert result["summary"]["status"] == "APPROVED"
+        assert result["issues"] == []
@@ -0,0 +1,102 @@
+"""
+Unit tests for SchemaService.
+Tests schema summary shaping and search filtering.
+"""
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from services.core.schema_service import SchemaService
+
+
+class TestSchemaServiceUnit:
+    @pytest.fixture
+    def service(self):
+        config = MagicMock()
+        config.environment = "Int"
+        config.database.schema_cache_ttl_seconds = 30
+        with patch('services.core.schema_service.DbConnectionService') as MockDb, \
+             patch('services.core.schema_service.get_config', return_value=config):
+            service = SchemaService()
+            service.db = MockDb.return_value
+            return service
+
+    def test_summary_groups_columns_by_table(self, service):
+        """Test each aggregated table row becomes one compact line."""
+        service.db.execute_query.return_value = [
+            ("dbo", "Users", "Id (int), Name (nvarchar)"),
+            ("sales", "Orders", "Id (int)"),
+        ]
+
+        result = service.get_summary(env="Int")
+
+        assert result["success"] is True
+        assert result["summary"] == [
+            "TABLE dbo.Users: Id (int), Name (nvarchar)",
+            "TABLE sales.Orders: Id (int)",
+        ]
+        assert service.db.execute_query.call_args.kwargs["params"] == [2147483647, None, None]
+
+    def test_table_names_only(self, service):
+        """Test include_columns=False skips the column aggregation query."""
+        service.db.execute_query.return_value = [("dbo", "Users"), ("sales", "Orders")]
+
+        result = service.get_summary(include_columns=False)
+
+        assert result["summary"] == ["TABLE dbo.Users", "TABLE sales.Orders"]
+        assert "sys.columns" not in service.db.execute_query.call_args.args[0]
+
+        # Cached separately from the full summary
+        service.db.execute_query.return_value = [("dbo", "Users", "Id (int)")]
+        assert service.get_summary()["summary"] == ["TABLE dbo.Users: Id (int)"]
+
+    def test_long_column_list_truncated(self, service):
+        """Test very wide tables are cut to 500 characters of columns."""
+        service.db.execute_query.return_value = [("dbo", "Wide", "c (int), " * 100)]
+
+        line = service.get_summary()["summary"][0]
+
+        assert line == "TABLE dbo.Wide: " + ("c (int), " * 100)[:500] + "..."
+
+    def test_search_term_bound_as_like_parameter(self, service):
+        """Test the search term is pushed to SQL as an escaped LIKE parameter."""
+        service.db.execute_query.return_value = []
+
+        service.get_summary(search_term="order_2024%")
+
+        # Searches are capped server-side to 51 tables
+        assert service.db.execute_query.call_args.kwargs["params"] == [51] + ["%order[_]2024[%]%"] * 2
+        assert "order_2024" not in service.db.execute_query.call_args.args[0]
+
+    def test_summary_cached_per_env_and_search(self, service):
+        """Test repeated summaries are served from cache until they expire."""
+        service.db.execute_query.return_value = [("dbo", "Users", "Id (int)")]
+
+        first = service.get_summary()
+        first["count"] = 99
+        first["summary"].append("TABLE dbo.Injected")
+        second = service.get_summary()
+        assert second["count"] == 1
+        assert second["summary"] == ["TABLE dbo.Users: Id (int)"]
+        second["summary"].clear()
+        assert service.get_summary()["summary"] == ["TABLE dbo.Users: Id (int)"]
+        assert service.get_summary(env="Int")["count"] == 1
+        assert service.db.execute_query.call_count == 1
+
+        service.get_summary(search_term="Users")
+        assert service.db.execute_query.call_count == 2
+
+        with patch('services.common.ttl_cache.time.monotonic', return_value=time.monotonic() + 3600):
+            service.get_summary()
+        assert service.db.execute_query.call_count == 3
+
+    def test_summary_error(self, service):
+        """Test database errors are returned as a failed result."""
+        service.db.execute_query.side_effect = Exception("DB Error")
+        with patch('services.core.schema_service.logger') as mock_logger:
+            result = service.get_summary()
+        assert result == {"success": False, "error": "DB Error"}
+        mock_logger.error.assert_called_once_with("schema_summary_error", env="Int", search_term=None, error="DB Error")
+        # Failures are not cached
+        service.db.execute_query.side_effect = None
+        service.db.execute_query.return_value = []
+        assert service.get_summary()["success"] is True
@@ -1,11 +1,12 @@
 """
-Unit tests for Security modules: ConcurrencyThrottler, NolockInjector, QueryCostChecker.
+Unit tests for Security modules: ConcurrencyThrottler, NolockInjector, QueryCostChecker, ResourceControlInjector.
 """
 import pytest
 from unittest.mock import Mock, MagicMock, patch
 from services.security.concurrency_throttler import ConcurrencyThrottler, TooManyConcurrentQueriesError
 from services.security.nolock_injector import NolockInjector
 from services.security.query_cost_checker import QueryCostChecker
+from services.security.resource_control_injector import ResourceControlInjector
 
 class TestConcurrencyThrottler:
     def test_acquire_release_success(self):
@@ -184,3 +185,28 @@ class TestNolockInjectorHelpers:
         </ShowPlanXML>"""
         # Should catch ValueError and continue (return 0.0 if max_cost=0)
         assert checker._extract_cost_from_plan(xml) == 0.0
+
+class TestResourceControlInjector:
+    def test_inject_resource_hints(self):
+        """Test hints are appended when no OPTION clause exists."""
+        injector = ResourceControlInjector()
+        result = injector.inject_resource_hints("SELECT * FROM T;", "Prd", maxdop=2, max_grant_percent=5)
+        assert result == "SELECT * FROM T OPTION (MAXDOP 2, MAX_GRANT_PERCENT = 5)"
+
+    def test_merge_existing_option(self):
+        """Test existing lower-case OPTION hints are kept with their original text."""
+        injector = ResourceControlInjector()
+        result = injector.inject_resource_hints("select * from T option (recompile)", "Prd")
+        assert result == "select * from T OPTION (recompile, MAXDOP 1, MAX_GRANT_PERCENT = 10)"
+
+    def test_existing_hints_not_duplicated(self):
+        """Test query is unchanged when both hints are already present."""
+        injector = ResourceControlInjector()
+        query = "SELECT * FROM T OPTION (maxdop 4, MAX_GRANT_PERCENT = 20)"
+        assert injector.inject_resource_hints(query, "Prd") == query
+
+    def test_empty_option_clause(self):
+        """Test an empty OPTION () list doesn't produce a dangling comma."""
+        injector = ResourceControlInjector()
+        result = injector.inject_resource_hints("SELECT * FROM T OPTION ( )", "Prd")
+        assert result == "SELECT * FROM T OPTION (MAXDOP 1, MAX_GRANT_PERCENT = 10)"
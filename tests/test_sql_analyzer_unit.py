@@ -3,8 +3,9 @@ Unit tests for SqlAnalyzer.
 Tests orchestration, risk scoring, and model population.
 """
 import pytest
+import sqlglot
 from unittest.mock import Mock, patch
-from services.analysis.sql_analyzer import SqlAnalyzer
+from services.analysis.sql_analyzer import SqlAnalyzer, _READONLY_CACHE, _leading_keyword
 from services.analysis.models import ReviewResult
 
 class TestSqlAnalyzerUnit:
@@ -20,6 +21,7 @@ class TestSqlAnalyzerUnit:
              patch('services.analysis.sql_analyzer.get_config', return_value=mock_config):
             analyzer = SqlAnalyzer()
             analyzer.bp_engine = mock_bp_engine # Ensure instance is replaced
+            _READONLY_CACHE.clear()
             return analyzer
 
     def test_analyze_clean_query(self, analyzer):
@@ -170,3 +172,32 @@ class TestSqlAnalyzerUnit:
         valid, msg = analyzer.validate_readonly("SELECT * FROM dbo.Users")
         assert valid is True
         assert msg == ""
+
+    def test_validate_readonly_cached(self, analyzer):
+        """Test repeated validation of the same query skips re-parsing."""
+        with patch('services.analysis.sql_analyzer.sqlglot.parse', wraps=sqlglot.parse) as mock_parse:
+            assert analyzer.validate_readonly("SELECT * FROM dbo.Orders") == (True, "")
+            assert analyzer.validate_readonly("SELECT * FROM dbo.Orders") == (True, "")
+            assert mock_parse.call_count == 1
+        # Keys are fixed-size digests, not the query text
+        assert all(len(digest) == 16 for digest, _ in _READONLY_CACHE._data)
+
+    def test_validate_readonly_fast_reject(self, analyzer):
+        """Test write/DDL statements are rejected from their leading keyword without parsing."""
+        with patch('services.analysis.sql_analyzer.sqlglot.parse') as mock_parse:
+            valid, msg = analyzer.validate_readonly("  -- cleanup\n/* batch */ DELETE FROM Users")
+            assert valid is False
+            assert "Only SELECT" in msg
+            mock_parse.assert_not_called()
+
+        # Identifiers that merely start with a keyword still go through the parser
+        valid, _ = analyzer.validate_readonly("SELECT updated_at FROM dbo.Users")
+        assert valid is True
+
+    def test_leading_keyword_skips_blanks_and_comments(self):
+        """Test the leading keyword scan past whitespace, comments and non-letter tokens."""
+        assert _leading_keyword(" " * 50 + "(SELECT 1)") is None
+        assert _leading_keyword(" " * 50) is None
+        assert _leading_keyword(" " * 50 + "; DROP TABLE dbo.T") is None
+        assert _leading_keyword("-- purge\n /* old rows */ DELETE FROM dbo.T") == "DELETE"
+        assert _leading_keyword("/* unterminated SELECT") is None
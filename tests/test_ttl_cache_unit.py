@@ -0,0 +1,52 @@
+"""
+Unit tests for TTLCache.
+"""
+from unittest.mock import patch
+from services.common.ttl_cache import TTLCache
+
+
+class TestTTLCacheUnit:
+    def test_get_set_and_default(self):
+        """Test stored values are returned and misses fall back to default."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("b", "missing") == "missing"
+
+    def test_entries_expire(self):
+        """Test entries are dropped once their ttl has passed."""
+        cache = TTLCache(maxsize=4, ttl=10)
+        with patch('services.common.ttl_cache.time.monotonic', return_value=100.0):
+            cache.set("a", 1)
+        with patch('services.common.ttl_cache.time.monotonic', return_value=109.0):
+            assert cache.get("a") == 1
+        with patch('services.common.ttl_cache.time.monotonic', return_value=110.0):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently read entry is evicted when full."""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_clear(self):
+        """Test clear drops every entry."""
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.get("a") is None
+
+    def test_zero_size_disables_cache(self):
+        """Test a zero maxsize stores nothing."""
+        cache = TTLCache(maxsize=0, ttl=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None